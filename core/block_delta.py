@@ -0,0 +1,204 @@
+import os
+import json
+import hashlib
+import zlib
+
+
+class BlockSignature:
+    """Weak and strong checksums of the fixed-size blocks of an uploaded file.
+
+    The signature of the last uploaded version is kept next to the file in a
+    hidden ``.<name>.topmap-sig`` sidecar. Comparing a new version against it
+    tells which blocks the server already has.
+    """
+
+    BLOCK_SIZE = 32 * 1024
+    SUFFIX = ".topmap-sig"
+
+    def __init__(self, block_size: int, size: int, sha256: str, blocks: list):
+        self.block_size = block_size
+        self.size = size
+        self.sha256 = sha256
+        self.blocks = blocks
+
+    @classmethod
+    def sidecar_path(cls, file_path: str) -> str:
+        directory, name = os.path.split(file_path)
+        return os.path.join(directory, f".{name}{cls.SUFFIX}")
+
+    @classmethod
+    def block_digest(cls, block: bytes):
+        return zlib.adler32(block), hashlib.blake2b(block, digest_size=16).hexdigest()
+
+    @classmethod
+    def compute(cls, file_path: str, block_size: int = BLOCK_SIZE):
+        file_digest = hashlib.sha256()
+        blocks = []
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                file_digest.update(block)
+                blocks.append(cls.block_digest(block))
+        return cls(
+            block_size, os.path.getsize(file_path), file_digest.hexdigest(), blocks
+        )
+
+    @classmethod
+    def load(cls, file_path: str):
+        try:
+            with open(cls.sidecar_path(file_path), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return cls(
+            data["block_size"],
+            data["size"],
+            data["sha256"],
+            [tuple(b) for b in data["blocks"]],
+        )
+
+    @classmethod
+    def discard(cls, file_path: str):
+        """Forget the signature when the server's copy no longer matches it."""
+        try:
+            os.remove(cls.sidecar_path(file_path))
+        except FileNotFoundError:
+            pass
+
+    def save(self, file_path: str):
+        path = self.sidecar_path(file_path)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "block_size": self.block_size,
+                    "size": self.size,
+                    "sha256": self.sha256,
+                    "blocks": self.blocks,
+                },
+                f,
+                separators=(",", ":"),
+            )
+        os.replace(f"{path}.tmp", path)
+
+
+class BlockDelta:
+    """Recipe that rebuilds a new file version from a base version.
+
+    ``ops`` is a list of ``["copy", base_block, count]`` and
+    ``["data", count]`` entries. Literal blocks are streamed in order after
+    the recipe, so only changed blocks travel over the network.
+
+    Blocks are compared at block boundaries and matched against any base
+    block by checksum. GeoPackages are SQLite files made of fixed-size pages
+    that are rewritten in place, so aligned matching finds unchanged data
+    without a byte-by-byte rolling search.
+    """
+
+    def __init__(self, base: BlockSignature, new: BlockSignature, ops, literals):
+        self.base = base
+        self.new = new
+        self.ops = ops
+        self.literals = literals
+
+    @classmethod
+    def compute(cls, base: BlockSignature, file_path: str):
+        new = BlockSignature.compute(file_path, base.block_size)
+
+        index = {}
+        for idx, digest in enumerate(base.blocks):
+            index.setdefault(digest, idx)
+
+        ops = []
+        literals = []
+        for idx, digest in enumerate(new.blocks):
+            base_idx = index.get(digest)
+            if base_idx is None:
+                literals.append(idx)
+                if ops and ops[-1][0] == "data":
+                    ops[-1][1] += 1
+                else:
+                    ops.append(["data", 1])
+            elif ops and ops[-1][0] == "copy" and sum(ops[-1][1:]) == base_idx:
+                # Extend the current run of consecutive base blocks
+                ops[-1][2] += 1
+            else:
+                ops.append(["copy", base_idx, 1])
+
+        return cls(base, new, ops, literals)
+
+    @property
+    def literal_size(self) -> int:
+        size = len(self.literals) * self.new.block_size
+        # The last block of the file is usually short
+        last = len(self.new.blocks) - 1
+        if self.literals and self.literals[-1] == last:
+            size -= self.new.block_size * len(self.new.blocks) - self.new.size
+        return size
+
+    def recipe(self) -> dict:
+        return {
+            "block_size": self.new.block_size,
+            "base_sha256": self.base.sha256,
+            "target_sha256": self.new.sha256,
+            "target_size": self.new.size,
+            "ops": self.ops,
+        }
+
+
+class LiteralBlockReader:
+    """File-like reader over the changed blocks of a file, in recipe order."""
+
+    def __init__(self, file_path: str, block_indexes: list, block_size: int):
+        self.file = open(file_path, "rb")
+        self.block_indexes = block_indexes
+        self.block_size = block_size
+        self.position = 0
+        self.buffer = b""
+
+    def read(self, size=-1) -> bytes:
+        while (size < 0 or len(self.buffer) < size) and self.position < len(
+            self.block_indexes
+        ):
+            self.file.seek(self.block_indexes[self.position] * self.block_size)
+            self.buffer += self.file.read(self.block_size)
+            self.position += 1
+
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    @property
+    def closed(self) -> bool:
+        return self.file.closed
+
+    def close(self):
+        self.file.close()
+
+
+def apply_delta(base_path: str, recipe: dict, literals, output_path: str):
+    """Rebuild a file from its base and a delta; the server-side counterpart.
+
+    ``literals`` is a readable stream of the literal blocks. Used by local
+    stand-in servers and to check recipes against the reference algorithm.
+    """
+    block_size = recipe["block_size"]
+    digest = hashlib.sha256()
+
+    with open(base_path, "rb") as base, open(output_path, "wb") as out:
+        for op in recipe["ops"]:
+            if op[0] == "copy":
+                base.seek(op[1] * block_size)
+                for _ in range(op[2]):
+                    block = base.read(block_size)
+                    digest.update(block)
+                    out.write(block)
+            else:
+                for _ in range(op[1]):
+                    block = literals.read(block_size)
+                    digest.update(block)
+                    out.write(block)
+
+    if os.path.getsize(output_path) != recipe["target_size"]:
+        raise ValueError("Delta produced a file of the wrong size")
+    if digest.hexdigest() != recipe["target_sha256"]:
+        raise ValueError("Delta produced a file with the wrong checksum")
@@ -0,0 +1,343 @@
+import os
+import json
+import sqlite3
+import time
+from functools import partial
+
+from qgis.core import QgsProject, QgsVectorLayer
+
+
+def file_marker(gpkg_path: str) -> str:
+    """Cheap change marker of a GeoPackage: size and mtime of it and its -wal.
+
+    QGIS edits GeoPackages in WAL mode, so a commit may only touch the
+    ``-wal`` file; both are part of the marker.
+    """
+    marker = []
+    for path in (gpkg_path, f"{gpkg_path}-wal"):
+        try:
+            stat = os.stat(path)
+            marker.append([stat.st_size, stat.st_mtime_ns])
+        except OSError:
+            marker.append(None)
+    return json.dumps(marker)
+
+
+class ChangesetJournal:
+    """Local journal of committed feature edits on the project's data.gpkg.
+
+    Stored as a small SQLite file in the project folder. Edits are folded per
+    feature as they arrive (insert+update stays an insert, insert+delete
+    disappears), so the journal holds at most one row per edited feature.
+
+    It is restarted whenever the GeoPackage is uploaded, with the hash of the
+    uploaded file as its base. Next to the edits it keeps the file_marker of
+    the file after the last journaled commit (the head); any change to the
+    file the journal did not see (a schema change, a style saved into the
+    GeoPackage, another program writing to it, a checkpoint outside a
+    commit) breaks that chain, and the journal then only reports that the
+    whole file has to be uploaded.
+    """
+
+    FILE_NAME = ".topmap_changes.sqlite"
+
+    def __init__(self, project_folder: str):
+        self.path = os.path.join(project_folder, self.FILE_NAME)
+        conn = self.connect()
+        try:
+            with conn:
+                conn.executescript(
+                    "CREATE TABLE IF NOT EXISTS changes ("
+                    " table_name TEXT NOT NULL,"
+                    " fid INTEGER NOT NULL,"
+                    " op TEXT NOT NULL,"
+                    " attributes TEXT,"
+                    " geometry BLOB,"
+                    " changed_at REAL NOT NULL,"
+                    " PRIMARY KEY (table_name, fid));"
+                    "CREATE TABLE IF NOT EXISTS state ("
+                    " key TEXT PRIMARY KEY,"
+                    " value TEXT);"
+                )
+        finally:
+            conn.close()
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def execute(self, sql: str, params=()) -> list:
+        conn = self.connect()
+        try:
+            with conn:
+                return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def record_many(self, changes):
+        """Fold (table_name, fid, op, attributes, geometry) tuples into the journal.
+
+        ``op`` is insert, update or delete; all changes share one transaction.
+        """
+        conn = self.connect()
+        try:
+            with conn:
+                for change in changes:
+                    self.record(conn, *change)
+        finally:
+            conn.close()
+
+    def record(self, conn, table_name, fid, op, attributes=None, geometry=None):
+        row = conn.execute(
+            "SELECT op, attributes, geometry FROM changes"
+            " WHERE table_name = ? AND fid = ?",
+            (table_name, fid),
+        ).fetchone()
+
+        if row:
+            previous_op, previous_attrs, previous_geom = row
+            if op == "delete" and previous_op == "insert":
+                # Created and removed since the last upload: nothing to send
+                conn.execute(
+                    "DELETE FROM changes WHERE table_name = ? AND fid = ?",
+                    (table_name, fid),
+                )
+                return
+            if op == "update":
+                merged = json.loads(previous_attrs or "{}")
+                merged.update(attributes or {})
+                attributes = merged
+                geometry = geometry if geometry is not None else previous_geom
+                op = previous_op
+
+        conn.execute(
+            "INSERT OR REPLACE INTO changes VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                table_name,
+                fid,
+                op,
+                json.dumps(attributes) if attributes is not None else None,
+                geometry,
+                time.time(),
+            ),
+        )
+
+    def changes(self) -> list:
+        rows = self.execute(
+            "SELECT table_name, fid, op, attributes, geometry FROM changes"
+            " ORDER BY changed_at"
+        )
+        return [
+            {
+                "table": table_name,
+                "fid": fid,
+                "op": op,
+                "attributes": json.loads(attributes) if attributes else None,
+                "geometry": geometry.hex() if geometry else None,
+            }
+            for table_name, fid, op, attributes, geometry in rows
+        ]
+
+    def is_empty(self) -> bool:
+        return self.execute("SELECT COUNT(*) FROM changes")[0][0] == 0
+
+    # -------------------- Coverage --------------------
+
+    def get_state(self, key: str):
+        rows = self.execute("SELECT value FROM state WHERE key = ?", (key,))
+        return rows[0][0] if rows else None
+
+    def set_state(self, key: str, value):
+        self.execute("INSERT OR REPLACE INTO state VALUES (?, ?)", (key, value))
+
+    def restart(self, base_sha256: str, marker: str):
+        """Empty the journal after the file with ``base_sha256`` was uploaded.
+
+        ``marker`` is the file_marker of that file.
+        """
+        conn = self.connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM changes")
+                conn.execute("DELETE FROM state")
+                conn.executemany(
+                    "INSERT INTO state VALUES (?, ?)",
+                    [("base_sha256", base_sha256), ("head_marker", marker)],
+                )
+        finally:
+            conn.close()
+
+    def require_full_upload(self):
+        self.set_state("full_upload", "1")
+
+    def before_commit(self, marker: str):
+        """Check the file is still what the last journaled commit left."""
+        if marker != self.get_state("head_marker"):
+            self.require_full_upload()
+
+    def after_commit(self, marker: str):
+        self.set_state("head_marker", marker)
+
+    def covers(self, marker: str, uploaded_sha256: str) -> bool:
+        """True when the journal holds every change from the uploaded file.
+
+        ``uploaded_sha256`` is the hash of the file as last uploaded (from the
+        sync manifest) and ``marker`` the file_marker of the file now.
+        """
+        return (
+            not self.get_state("full_upload")
+            and self.get_state("base_sha256") == uploaded_sha256
+            and self.get_state("head_marker") == marker
+        )
+
+
+def json_value(value):
+    """Convert a QGIS attribute value into something json can store."""
+    if value is None or (hasattr(value, "isNull") and value.isNull()):
+        return None
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+class EditTracker:
+    """Record committed edits of GeoPackage layers into a ChangesetJournal.
+
+    Watches every vector layer added to the project whose source is the
+    project folder's ``data.gpkg`` (the file QgisVectorProcessor writes) and
+    hooks its ``committed*`` edit signals. The file_marker is read before and
+    after each commit so the journal can tell whether it saw every change;
+    schema changes, which it cannot replay, mark it for a full upload.
+    """
+
+    def __init__(self, project: QgsProject = None):
+        self.project = project or QgsProject.instance()
+        self.connections = []
+
+    def start(self):
+        self.project.layersAdded.connect(self.on_layers_added)
+        self.on_layers_added(list(self.project.mapLayers().values()))
+
+    def stop(self):
+        try:
+            self.project.layersAdded.disconnect(self.on_layers_added)
+        except TypeError:
+            pass
+        for signal, slot in self.connections:
+            try:
+                signal.disconnect(slot)
+            except (TypeError, RuntimeError):
+                # Layer already deleted
+                pass
+        self.connections = []
+
+    def gpkg_path(self):
+        home = self.project.homePath()
+        return os.path.normcase(os.path.join(home, "data.gpkg")) if home else None
+
+    def gpkg_marker(self):
+        return file_marker(os.path.join(self.project.homePath(), "data.gpkg"))
+
+    def table_for(self, layer: QgsVectorLayer):
+        """Return the GeoPackage table name if the layer lives in data.gpkg."""
+        if layer.providerType() != "ogr":
+            return None
+        path, _, options = layer.source().partition("|")
+        if os.path.normcase(os.path.abspath(path)) != self.gpkg_path():
+            return None
+        for option in options.split("|"):
+            if option.startswith("layername="):
+                return option.split("=", 1)[1]
+        return None
+
+    def on_layers_added(self, layers):
+        for layer in layers:
+            if not isinstance(layer, QgsVectorLayer):
+                continue
+            table_name = self.table_for(layer)
+            if not table_name:
+                continue
+
+            hooks = [
+                (layer.committedFeaturesAdded, self.on_features_added),
+                (layer.committedFeaturesRemoved, self.on_features_removed),
+                (layer.committedAttributeValuesChanges, self.on_attributes_changed),
+                (layer.committedGeometriesChanges, self.on_geometries_changed),
+                (layer.committedAttributesAdded, self.on_schema_changed),
+                (layer.committedAttributesDeleted, self.on_schema_changed),
+                (layer.beforeCommitChanges, partial(self.on_commit, layer.id())),
+                (
+                    layer.afterCommitChanges,
+                    partial(self.on_commit, layer.id(), after=True),
+                ),
+            ]
+            for signal, slot in hooks:
+                signal.connect(slot)
+                self.connections.append((signal, slot))
+
+    def journal_for(self, layer_id):
+        layer = self.project.mapLayer(layer_id)
+        table_name = self.table_for(layer) if layer else None
+        if not table_name:
+            return None, None
+        return ChangesetJournal(self.project.homePath()), table_name
+
+    def on_commit(self, layer_id, *args, after=False):
+        journal, _ = self.journal_for(layer_id)
+        if not journal:
+            return
+        marker = self.gpkg_marker()
+        if after:
+            journal.after_commit(marker)
+        else:
+            journal.before_commit(marker)
+
+    def on_schema_changed(self, layer_id, attributes):
+        journal, _ = self.journal_for(layer_id)
+        if journal:
+            journal.require_full_upload()
+
+    def on_features_added(self, layer_id, features):
+        journal, table_name = self.journal_for(layer_id)
+        if not journal:
+            return
+        changes = []
+        for feature in features:
+            attributes = {
+                field.name(): json_value(value)
+                for field, value in zip(feature.fields(), feature.attributes())
+            }
+            geometry = None
+            if feature.hasGeometry():
+                geometry = bytes(feature.geometry().asWkb())
+            changes.append((table_name, feature.id(), "insert", attributes, geometry))
+        journal.record_many(changes)
+
+    def on_features_removed(self, layer_id, fids):
+        journal, table_name = self.journal_for(layer_id)
+        if not journal:
+            return
+        journal.record_many((table_name, fid, "delete") for fid in fids)
+
+    def on_attributes_changed(self, layer_id, changed_values):
+        journal, table_name = self.journal_for(layer_id)
+        if not journal:
+            return
+        fields = self.project.mapLayer(layer_id).fields()
+        journal.record_many(
+            (
+                table_name,
+                fid,
+                "update",
+                {fields.at(idx).name(): json_value(v) for idx, v in values.items()},
+            )
+            for fid, values in changed_values.items()
+        )
+
+    def on_geometries_changed(self, layer_id, changed_geometries):
+        journal, table_name = self.journal_for(layer_id)
+        if not journal:
+            return
+        journal.record_many(
+            (table_name, fid, "update", {}, bytes(geometry.asWkb()))
+            for fid, geometry in changed_geometries.items()
+        )
@@ -0,0 +1,190 @@
+import os
+import json
+
+from .compression import compress_bytes
+
+
+class ChunkedUploader:
+    """Resumable, part-by-part upload of large files.
+
+    The server session is opened once per file; its id is kept next to the
+    file in a small ``.topmap-upload`` sidecar so that an interrupted upload
+    continues from the first missing part on the next sync instead of byte zero.
+    """
+
+    PART_SIZE = 8 * 1024 * 1024
+    STATE_SUFFIX = ".topmap-upload"
+
+    def __init__(self, api, part_size: int = PART_SIZE, encoding=None):
+        self.api = api
+        self.part_size = part_size
+        self.encoding = encoding
+        self.raw_bytes = 0
+        self.encoded_bytes = 0
+
+    def uploads_url(self, project_id: int) -> str:
+        return f"{self.api.BASE_URL}/projects/{project_id}/files/uploads/"
+
+    # -------------------- Resume state --------------------
+
+    def state_path(self, file_path: str) -> str:
+        directory, name = os.path.split(file_path)
+        return os.path.join(directory, f".{name}{self.STATE_SUFFIX}")
+
+    def load_state(self, file_path: str):
+        """Return the saved upload session if it still matches the file on disk."""
+        path = self.state_path(file_path)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        stat = os.stat(file_path)
+        if (
+            state.get("size") != stat.st_size
+            or state.get("mtime_ns") != stat.st_mtime_ns
+            or state.get("part_size") != self.part_size
+        ):
+            # File changed since the session was opened; start over
+            return None
+        return state
+
+    def save_state(self, file_path: str, state: dict):
+        path = self.state_path(file_path)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+
+    def clear_state(self, file_path: str):
+        try:
+            os.remove(self.state_path(file_path))
+        except FileNotFoundError:
+            pass
+
+    # -------------------- Upload --------------------
+
+    def upload(
+        self,
+        project_id: int,
+        file_path: str,
+        relative_path=None,
+        limiter=None,
+        progress=None,
+    ):
+        stat = os.stat(file_path)
+        state = self.load_state(file_path)
+        uploaded_parts = set()
+
+        if state:
+            uploaded_parts = self.fetch_uploaded_parts(project_id, state["upload_id"])
+            if uploaded_parts is None:
+                # Server forgot the session (expired or completed elsewhere)
+                state = None
+                uploaded_parts = set()
+
+        if not state:
+            state = {
+                "upload_id": self.start_session(
+                    project_id, file_path, relative_path, stat.st_size
+                ),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "part_size": self.part_size,
+            }
+            self.save_state(file_path, state)
+
+        upload_id = state["upload_id"]
+        part_count = max(1, -(-stat.st_size // self.part_size))
+
+        with open(file_path, "rb") as f:
+            for part_number in range(part_count):
+                if part_number not in uploaded_parts:
+                    f.seek(part_number * self.part_size)
+                    data = f.read(self.part_size)
+                    if limiter:
+                        limiter.consume(len(data))
+                    self.put_part(project_id, upload_id, part_number, data)
+                if progress:
+                    sent = min((part_number + 1) * self.part_size, stat.st_size)
+                    progress(sent, stat.st_size)
+
+        result = self.complete(project_id, upload_id)
+        self.clear_state(file_path)
+        if self.encoding:
+            self.api.compression_stats.record(
+                file_path, self.encoding, self.raw_bytes, self.encoded_bytes
+            )
+        return result
+
+    def start_session(self, project_id, file_path, relative_path, size) -> str:
+        payload = {
+            "name": os.path.basename(file_path),
+            "size": size,
+            "part_size": self.part_size,
+        }
+        if relative_path:
+            payload["path"] = relative_path
+
+        response = self.api.request(
+            "POST", self.uploads_url(project_id), json=payload
+        )
+        response.raise_for_status()
+        return self.response_json(response, "upload_id")
+
+    def fetch_uploaded_parts(self, project_id, upload_id):
+        """Return the part numbers the server already holds, None if unknown."""
+        response = self.api.request(
+            "GET", f"{self.uploads_url(project_id)}{upload_id}/"
+        )
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return set(self.response_json(response, "parts", default=[]))
+
+    def put_part(self, project_id, upload_id, part_number, data: bytes):
+        url = f"{self.uploads_url(project_id)}{upload_id}/parts/{part_number}/"
+        headers = {"Content-Type": "application/octet-stream"}
+
+        # Each part is compressed on its own so parts stay independently resumable
+        if self.encoding:
+            self.raw_bytes += len(data)
+            data = compress_bytes(data, self.encoding)
+            self.encoded_bytes += len(data)
+            headers["Content-Encoding"] = self.encoding
+
+        # Parts are idempotent PUTs, so the client's retry policy covers them
+        response = self.api.request("PUT", url, data=data, headers=headers)
+        response.raise_for_status()
+
+    def complete(self, project_id, upload_id):
+        # Completing the same upload id twice is harmless on the server
+        response = self.api.request(
+            "POST",
+            f"{self.uploads_url(project_id)}{upload_id}/complete/",
+            idempotent=True,
+        )
+        response.raise_for_status()
+        return self.response_json(response)
+
+    @staticmethod
+    def response_json(response, key=None, default=None):
+        """Decode a JSON reply (or one key of it) from the upload endpoints.
+
+        A body that is not JSON, or lacks a required key, raises the same
+        RuntimeError as other upload failures, with the server's reply.
+        """
+        try:
+            data = response.json()
+            if key is None:
+                return data
+            if default is not None:
+                return data.get(key, default)
+            return data[key]
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise RuntimeError(
+                f"Unexpected upload server response ({response.status_code}): "
+                f"{response.text[:500]!r}"
+            ) from e
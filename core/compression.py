@@ -0,0 +1,185 @@
+import struct
+import threading
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # optional, gzip is always available
+    zstandard = None
+
+try:
+    # What urllib3 decodes in responses; zstd only from urllib3 2 onwards
+    from urllib3.util.request import ACCEPT_ENCODING as DECODABLE_ENCODINGS
+except ImportError:
+    DECODABLE_ENCODINGS = "gzip,deflate"
+
+
+# Containers that are already compressed; re-compressing them wastes CPU
+COMPRESSED_EXTENSIONS = (
+    ".qgz",
+    ".zip",
+    ".gz",
+    ".zst",
+    ".7z",
+    ".jpg",
+    ".jpeg",
+    ".png",
+    ".webp",
+    ".jp2",
+    ".ecw",
+    ".sid",
+)
+
+TIFF_EXTENSIONS = (".tif", ".tiff")
+TIFF_COMPRESSION_TAG = 259
+TIFF_TILE_WIDTH_TAG = 322
+
+
+def available_encodings() -> list:
+    """Content-encodings this installation can produce and decode, best first."""
+    return (["zstd"] if zstandard else []) + ["gzip"]
+
+
+def decodable_encodings() -> list:
+    """Content-encodings the installed urllib3 decodes on download, best first."""
+    supported = {name.strip() for name in DECODABLE_ENCODINGS.split(",")}
+    return [name for name in available_encodings() if name in supported]
+
+
+def accept_encoding_header() -> str:
+    return ", ".join(decodable_encodings() + ["deflate"])
+
+
+def tiff_tags(path: str) -> dict:
+    """Read the first IFD of a (Big)TIFF: tag -> raw value field bytes."""
+    tags = {}
+    try:
+        with open(path, "rb") as f:
+            header = f.read(16)
+            order = {b"II": "<", b"MM": ">"}.get(header[:2])
+            if not order:
+                return tags
+
+            version = struct.unpack(f"{order}H", header[2:4])[0]
+            if version == 42:
+                f.seek(struct.unpack(f"{order}I", header[4:8])[0])
+                count = struct.unpack(f"{order}H", f.read(2))[0]
+                entry_format, entry_size = f"{order}HHI4s", 12
+            elif version == 43:
+                f.seek(struct.unpack(f"{order}Q", header[8:16])[0])
+                count = struct.unpack(f"{order}Q", f.read(8))[0]
+                entry_format, entry_size = f"{order}HHQ8s", 20
+            else:
+                return tags
+
+            for _ in range(count):
+                tag, _, _, value = struct.unpack(
+                    entry_format, f.read(entry_size)
+                )
+                tags[tag] = (order, value)
+    except (OSError, struct.error):
+        pass
+    return tags
+
+
+def tiff_is_compressed(path: str) -> bool:
+    """Check the Compression tag of the first IFD of a (Big)TIFF."""
+    tag = tiff_tags(path).get(TIFF_COMPRESSION_TAG)
+    if not tag:
+        return False
+    order, value = tag
+    # SHORT values are left-aligned in the value field
+    return struct.unpack(f"{order}H", value[:2])[0] != 1
+
+
+def tiff_is_tiled(path: str) -> bool:
+    """Tiled TIFFs carry TileWidth; striped ones StripOffsets instead."""
+    return TIFF_TILE_WIDTH_TAG in tiff_tags(path)
+
+
+def should_compress(path: str) -> bool:
+    lower = path.lower()
+    if lower.endswith(COMPRESSED_EXTENSIONS):
+        return False
+    if lower.endswith(TIFF_EXTENSIONS):
+        return not tiff_is_compressed(path)
+    return True
+
+
+class CompressingStream:
+    """Compress another byte stream on the fly.
+
+    Wraps anything with ``read(size)`` (e.g. MultipartFileStream) and yields
+    encoded blocks, so memory use stays at one block. The length is unknown
+    up front, which makes requests send the body with chunked encoding.
+    """
+
+    BLOCK_SIZE = 256 * 1024
+
+    def __init__(self, source, encoding: str = "gzip", level: int = 6):
+        if encoding == "zstd":
+            if not zstandard:
+                raise ValueError("zstd encoding requires the zstandard package")
+            self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        elif encoding == "gzip":
+            self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        else:
+            raise ValueError(f"Unsupported content encoding: {encoding}")
+
+        self.source = source
+        self.encoding = encoding
+        self.raw_bytes = 0
+        self.encoded_bytes = 0
+
+    def __iter__(self):
+        while True:
+            block = self.source.read(self.BLOCK_SIZE)
+            if not block:
+                break
+            self.raw_bytes += len(block)
+            encoded = self.compressor.compress(block)
+            if encoded:
+                self.encoded_bytes += len(encoded)
+                yield encoded
+
+        tail = self.compressor.flush()
+        self.encoded_bytes += len(tail)
+        if tail:
+            yield tail
+
+    @property
+    def ratio(self) -> float:
+        return self.raw_bytes / self.encoded_bytes if self.encoded_bytes else 1.0
+
+
+def compress_bytes(data: bytes, encoding: str, level: int = 6) -> bytes:
+    """One-shot variant of CompressingStream for in-memory chunks."""
+    if encoding == "zstd" and zstandard:
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    if encoding == "gzip":
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+class CompressionStats:
+    """Thread-safe record of the compression ratio achieved per transferred file."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.files = {}
+
+    def record(self, path: str, encoding, raw_bytes: int, encoded_bytes: int):
+        with self.lock:
+            self.files[path] = {
+                "encoding": encoding,
+                "raw_bytes": raw_bytes,
+                "encoded_bytes": encoded_bytes,
+            }
+
+    def ratio(self, path: str):
+        with self.lock:
+            entry = self.files.get(path)
+        if not entry or not entry["encoded_bytes"]:
+            return None
+        return round(entry["raw_bytes"] / entry["encoded_bytes"], 2)
@@ -0,0 +1,144 @@
+import os
+import sqlite3
+
+try:
+    from osgeo import gdal, ogr
+except ImportError:  # Tables then keep GDAL's default spatial index handling
+    gdal = None
+    ogr = None
+
+
+class GeoPackageExportSession:
+    """Bulk-load settings and clean-up around writing tables into a GeoPackage.
+
+    Use as a context manager around the exports, in the thread that does the
+    writing: GDAL config options are set thread-locally so every connection
+    opened for the export gets bulk-load pragmas. The journal mode is left
+    alone; with synchronous=OFF the default rollback journal is as fast for
+    a single writer. Tables are created without a spatial index; on exit the
+    R-tree indexes are built in one go and the file is vacuumed and analyzed,
+    so the uploaded GeoPackage is compact.
+
+    When ``owned_tables`` is set, tables outside it (left behind by layers
+    that were removed or renamed) are dropped on exit as well.
+    """
+
+    BULK_PRAGMAS = "synchronous=OFF,cache_size=-131072,temp_store=MEMORY"
+    # Share of free pages above which VACUUM is worth rewriting the file
+    VACUUM_FREE_RATIO = 0.2
+
+    STYLES_TABLE = "layer_styles"
+
+    def __init__(self, gpkg_path: str):
+        self.gpkg_path = gpkg_path
+        self.tables = []
+        self.dropped = []
+        self.owned_tables = None
+        self.created = False
+
+    def __enter__(self):
+        self.tables = []
+        self.dropped = []
+        self.created = not os.path.exists(self.gpkg_path)
+        if gdal is not None:
+            gdal.SetThreadLocalConfigOption("OGR_SQLITE_PRAGMA", self.BULK_PRAGMAS)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if gdal is not None:
+            gdal.SetThreadLocalConfigOption("OGR_SQLITE_PRAGMA", None)
+        if not os.path.exists(self.gpkg_path):
+            return False
+        if exc_type is None and self.owned_tables is not None:
+            self.drop_orphan_tables()
+        if self.tables or self.dropped:
+            self.build_spatial_indexes()
+            self.compact()
+        return False
+
+    def layer_options(self) -> list:
+        """Creation options for a new table written in this session."""
+        # Without GDAL we cannot build the index afterwards, so keep it inline
+        return ["SPATIAL_INDEX=NO"] if gdal is not None else []
+
+    def add_table(self, table_name: str):
+        self.tables.append(table_name)
+
+    def drop_orphan_tables(self):
+        """Drop tables no layer of the project writes or reads any more."""
+        if gdal is None:
+            return
+        keep = {name.lower() for name in self.owned_tables}
+        keep.add(self.STYLES_TABLE)
+        dataset = gdal.OpenEx(self.gpkg_path, gdal.OF_VECTOR | gdal.OF_UPDATE)
+        if dataset is None:
+            print(f"Could not open {self.gpkg_path} to drop unused tables")
+            return
+        try:
+            for index in range(dataset.GetLayerCount() - 1, -1, -1):
+                table_name = dataset.GetLayer(index).GetName()
+                if table_name.lower() in keep:
+                    continue
+                if dataset.DeleteLayer(index) != 0:
+                    print(f"Could not drop unused table {table_name}")
+                    continue
+                self.dropped.append(table_name)
+                if dataset.GetLayerByName(self.STYLES_TABLE) is not None:
+                    table = table_name.replace("'", "''")
+                    dataset.ExecuteSQL(
+                        f"DELETE FROM {self.STYLES_TABLE}"
+                        f" WHERE f_table_name = '{table}'"
+                    )
+        finally:
+            dataset = None
+
+    def build_spatial_indexes(self):
+        if gdal is None:
+            return
+        dataset = gdal.OpenEx(self.gpkg_path, gdal.OF_VECTOR | gdal.OF_UPDATE)
+        if dataset is None:
+            print(f"Could not open {self.gpkg_path} to build spatial indexes")
+            return
+        try:
+            for table_name in self.tables:
+                layer = dataset.GetLayerByName(table_name)
+                if layer is None or layer.GetGeomType() == ogr.wkbNone:
+                    continue
+                table = table_name.replace("'", "''")
+                column = layer.GetGeometryColumn().replace("'", "''")
+                result = dataset.ExecuteSQL(
+                    f"SELECT CreateSpatialIndex('{table}', '{column}')"
+                )
+                if result is not None:
+                    dataset.ReleaseResultSet(result)
+        finally:
+            dataset = None  # close so GDAL flushes the indexes
+
+    def compact(self):
+        """Checkpoint any write-ahead log, then vacuum if it is worth it.
+
+        QGIS keeps GeoPackages it has open in WAL mode; the log is folded
+        into the file so the upload does not miss changes, but the mode is
+        not switched, which would need every other connection closed.
+        VACUUM rewrites the whole file and only runs for a file created in
+        this session or one with a large share of free pages.
+        """
+        conn = sqlite3.connect(self.gpkg_path, timeout=10, isolation_level=None)
+        try:
+            busy, _, _ = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+            if busy:
+                print(f"{self.gpkg_path}: write-ahead log only partly checkpointed")
+            if self.created or self.free_ratio(conn) > self.VACUUM_FREE_RATIO:
+                conn.execute("VACUUM")
+            conn.execute("ANALYZE")
+        except sqlite3.Error as e:
+            # The GeoPackage stays valid, just not compacted this time
+            print(f"GeoPackage compaction skipped: {e}")
+        finally:
+            conn.close()
+
+    @staticmethod
+    def free_ratio(conn) -> float:
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return free_pages / page_count if page_count else 0.0
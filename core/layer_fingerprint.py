@@ -0,0 +1,123 @@
+import os
+import glob
+import json
+import hashlib
+import sqlite3
+
+from PyQt5.QtXml import QDomDocument
+from qgis.core import QgsMapLayer, QgsVectorLayer
+
+from .layer_sources import FILE, layer_class
+
+
+def layer_fingerprint(layer: QgsMapLayer, extent=None):
+    """Hash everything that decides what containerize writes for a layer.
+
+    ``extent`` is the area exported for layers cached only partially.
+    Returns None for layers whose data can change without a trace we can
+    see: memory, database, web and virtual layers, and file layers that
+    are not a single local file. Those are therefore always exported.
+    """
+    source = layer.source()
+    path = source.split("|")[0]
+    if layer_class(layer) != FILE or not os.path.isfile(path):
+        return None
+
+    parts = {
+        "provider": layer.providerType(),
+        "source": source,
+        "crs": layer.crs().authid(),
+    }
+
+    if extent is not None:
+        parts["extent"] = extent.toString()
+
+    # Sidecars change on their own: a shapefile's .dbf on attribute edits,
+    # a GeoPackage's -wal until it is checkpointed, a raster's .aux.xml
+    stem = glob.escape(os.path.splitext(path)[0])
+    parts["files"] = []
+    for related in sorted({path, *glob.glob(f"{stem}.*")}):
+        if os.path.isfile(related):
+            stat = os.stat(related)
+            parts["files"].append(
+                [os.path.basename(related), stat.st_size, stat.st_mtime_ns]
+            )
+
+    if isinstance(layer, QgsVectorLayer):
+        parts["subset"] = layer.subsetString()
+        parts["feature_count"] = layer.featureCount()
+        parts["fields"] = [field.name() for field in layer.fields()]
+
+    doc = QDomDocument()
+    layer.exportNamedStyle(doc)
+    parts["style"] = hashlib.sha256(doc.toString().encode("utf-8")).hexdigest()
+
+    encoded = json.dumps(parts, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class LayerFingerprints:
+    """Fingerprints of the layers written by the last containerize run.
+
+    Kept in the project folder so containerize can leave outputs whose
+    source layer has not changed untouched.
+    """
+
+    FILE_NAME = ".topmap_layers.json"
+
+    def __init__(self, project_folder: str):
+        self.path = os.path.join(project_folder, self.FILE_NAME)
+        self.entries = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def unchanged(
+        self, key: str, fingerprint, output_path: str, table_name: str = None
+    ) -> bool:
+        """Whether the output of ``key`` is still there and up to date.
+
+        ``table_name`` is the GeoPackage table the output lives in, for
+        outputs that share one file.
+        """
+        if fingerprint is None or self.entries.get(key) != fingerprint:
+            return False
+        if not os.path.exists(output_path):
+            return False
+        return table_name is None or gpkg_has_table(output_path, table_name)
+
+    def retain(self, prefix: str, names):
+        """Forget ``prefix`` entries (e.g. "vector:") not named in ``names``."""
+        names = set(names)
+        for key in list(self.entries):
+            if key.startswith(prefix) and key[len(prefix) :] not in names:
+                del self.entries[key]
+
+    def update(self, key: str, fingerprint):
+        if fingerprint is None:
+            self.entries.pop(key, None)
+        else:
+            self.entries[key] = fingerprint
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def gpkg_has_table(gpkg_path: str, table_name: str) -> bool:
+    try:
+        conn = sqlite3.connect(gpkg_path, timeout=10)
+        try:
+            row = conn.execute(
+                "SELECT 1 FROM gpkg_contents WHERE lower(table_name) = lower(?)",
+                (table_name,),
+            ).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+    return row is not None
@@ -0,0 +1,107 @@
+from qgis.core import QgsCoordinateTransform, QgsMapLayer, QgsProject
+
+
+FILE = "file"
+DATABASE = "database"
+WEB = "web"
+MEMORY = "memory"
+VIRTUAL = "virtual"
+
+WEB_PROVIDERS = (
+    "wms",
+    "wcs",
+    "wfs",
+    "oapif",
+    "arcgismapserver",
+    "arcgisfeatureserver",
+)
+DATABASE_PROVIDERS = (
+    "postgres",
+    "postgresraster",
+    "mssql",
+    "oracle",
+    "hana",
+    "db2",
+    "spatialite",
+)
+REMOTE_PREFIXES = (
+    "http://",
+    "https://",
+    "ftp://",
+    "/vsicurl",
+    "/vsis3",
+    "/vsigs",
+    "/vsiaz",
+    "/vsiadls",
+    "/vsioss",
+    "/vsiswift",
+)
+DATABASE_PREFIXES = ("pg:", "mssql:", "oci:", "mysql:", "odbc:")
+
+# What containerize does with each class of layer. Web layers stay
+# references by default; "cache" exports a bounded snapshot instead.
+REFERENCE = "reference"
+EXPORT = "export"
+CACHE = "cache"
+DEFAULT_POLICIES = {
+    FILE: EXPORT,
+    DATABASE: EXPORT,
+    WEB: REFERENCE,
+    MEMORY: EXPORT,
+    VIRTUAL: EXPORT,
+}
+
+# Longest side, in pixels, of a cached web raster
+WEB_CACHE_MAX_SIZE = 4096
+
+
+def layer_class(layer: QgsMapLayer) -> str:
+    """Classify a layer by where its data lives: file, database, web, ..."""
+    provider = layer.providerType().lower()
+    if provider == "memory":
+        return MEMORY
+    if provider == "virtual":
+        return VIRTUAL
+    if provider in WEB_PROVIDERS:
+        return WEB
+    if provider in DATABASE_PROVIDERS:
+        return DATABASE
+
+    source = layer.source().split("|")[0].strip().lower()
+    if source.startswith(REMOTE_PREFIXES):
+        return WEB
+    if source.startswith(DATABASE_PREFIXES):
+        return DATABASE
+    return FILE
+
+
+def layer_policy(layer: QgsMapLayer, web_policy: str = None) -> str:
+    """Containerize policy for a layer: export, reference or cache."""
+    cls = layer_class(layer)
+    if cls == WEB and web_policy in (REFERENCE, CACHE):
+        return web_policy
+    return DEFAULT_POLICIES[cls]
+
+
+def cache_extent(project: QgsProject, layer: QgsMapLayer):
+    """Project default view extent in the layer's CRS, None if unset.
+
+    This is the area a web layer cache is limited to.
+    """
+    view = project.viewSettings().defaultViewExtent()
+    if view.isNull() or view.isEmpty():
+        return None
+
+    extent = QgsCoordinateTransform(
+        view.crs(), layer.crs(), project
+    ).transformBoundingBox(view)
+    extent = extent.intersect(layer.extent())
+    return None if extent.isEmpty() else extent
+
+
+def cache_size(extent, max_size: int = WEB_CACHE_MAX_SIZE):
+    """Pixel size of a cached raster for ``extent``, longest side max_size."""
+    width, height = extent.width(), extent.height()
+    if width >= height:
+        return max_size, max(1, round(max_size * height / width))
+    return max(1, round(max_size * width / height)), max_size
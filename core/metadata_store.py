@@ -0,0 +1,240 @@
+import os
+import json
+import sqlite3
+import time
+
+from qgis.core import QgsApplication
+
+
+class MetadataStore:
+    """Local index of projects, their remote files and what was downloaded.
+
+    A SQLite file in the QGIS profile directory. The project list and user
+    profile are shown from it straight away at startup and reconciled with
+    the server in the background; downloads and syncs record their local
+    paths, hashes and timestamps here.
+    """
+
+    FILE_NAME = "topmap_metadata.sqlite"
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(
+            QgsApplication.qgisSettingsDirPath(), self.FILE_NAME
+        )
+        conn = self.connect()
+        try:
+            with conn:
+                conn.executescript(
+                    "CREATE TABLE IF NOT EXISTS projects ("
+                    " id INTEGER PRIMARY KEY,"
+                    " name TEXT NOT NULL,"
+                    " summary TEXT NOT NULL,"
+                    " local_path TEXT,"
+                    " listed_at REAL,"
+                    " downloaded_at REAL,"
+                    " synced_at REAL,"
+                    " removed_at REAL);"
+                    "CREATE TABLE IF NOT EXISTS files ("
+                    " project_id INTEGER NOT NULL,"
+                    " name TEXT NOT NULL,"
+                    " url TEXT,"
+                    " sha256 TEXT,"
+                    " local_path TEXT,"
+                    " downloaded_at REAL,"
+                    " PRIMARY KEY (project_id, name));"
+                    "CREATE INDEX IF NOT EXISTS files_local_path ON files (local_path);"
+                    "CREATE TABLE IF NOT EXISTS profile ("
+                    " key TEXT PRIMARY KEY,"
+                    " value TEXT NOT NULL);"
+                )
+        finally:
+            conn.close()
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def execute(self, sql: str, params=()) -> list:
+        conn = self.connect()
+        try:
+            with conn:
+                return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    # -------------------------
+    # Profile
+    # -------------------------
+    def get_profile(self):
+        rows = self.execute("SELECT value FROM profile WHERE key = 'user'")
+        return json.loads(rows[0][0]) if rows else None
+
+    def set_profile(self, profile: dict):
+        self.execute(
+            "INSERT OR REPLACE INTO profile VALUES ('user', ?)", (json.dumps(profile),)
+        )
+
+    # -------------------------
+    # Projects
+    # -------------------------
+    def projects(self) -> list:
+        """Project summaries as last seen on the server, as API dicts."""
+        rows = self.execute(
+            "SELECT summary FROM projects WHERE removed_at IS NULL ORDER BY name"
+        )
+        return [json.loads(summary) for (summary,) in rows]
+
+    def upsert_projects(self, projects: list):
+        """Store project summaries (without their file lists)."""
+        now = time.time()
+        conn = self.connect()
+        try:
+            with conn:
+                for project in projects:
+                    if project.get("id") is None:
+                        continue
+                    summary = {k: v for k, v in project.items() if k != "files"}
+                    conn.execute(
+                        "INSERT INTO projects (id, name, summary, listed_at)"
+                        " VALUES (?, ?, ?, ?)"
+                        " ON CONFLICT (id) DO UPDATE SET name = excluded.name,"
+                        " summary = excluded.summary, listed_at = excluded.listed_at,"
+                        " removed_at = NULL",
+                        (
+                            project["id"],
+                            project.get("name", ""),
+                            json.dumps(summary),
+                            now,
+                        ),
+                    )
+        finally:
+            conn.close()
+
+    def prune_projects(self, keep_ids):
+        """Drop projects that are no longer on the server.
+
+        Projects that were downloaded are only marked removed, so the next
+        Load Projects can still find and clean up their local folder.
+        """
+        keep_ids = set(keep_ids)
+        rows = self.execute("SELECT id, local_path FROM projects")
+        stale = [(pid, path) for pid, path in rows if pid not in keep_ids]
+
+        conn = self.connect()
+        try:
+            with conn:
+                for pid, path in stale:
+                    if path:
+                        conn.execute(
+                            "UPDATE projects SET removed_at = ?"
+                            " WHERE id = ? AND removed_at IS NULL",
+                            (time.time(), pid),
+                        )
+                    else:
+                        self.delete_project(conn, pid)
+        finally:
+            conn.close()
+
+    def delete_project(self, conn, project_id: int):
+        conn.execute("DELETE FROM files WHERE project_id = ?", (project_id,))
+        conn.execute("DELETE FROM projects WHERE id = ?", (project_id,))
+
+    def forget_projects(self, project_ids):
+        conn = self.connect()
+        try:
+            with conn:
+                for project_id in project_ids:
+                    self.delete_project(conn, project_id)
+        finally:
+            conn.close()
+
+    def local_paths(self, removed: bool = False) -> dict:
+        """project id -> local folder of downloaded (or removed) projects."""
+        condition = "IS NOT NULL" if removed else "IS NULL"
+        rows = self.execute(
+            "SELECT id, local_path FROM projects"
+            f" WHERE local_path IS NOT NULL AND removed_at {condition}"
+        )
+        return dict(rows)
+
+    # -------------------------
+    # Files
+    # -------------------------
+    def set_files(self, project_id: int, local_path: str, jobs: list):
+        """Record a project's remote files from its download jobs.
+
+        ``jobs`` are the (url, path, name, sha256) tuples of
+        project_download_jobs; files no longer on the server are dropped.
+        """
+        conn = self.connect()
+        try:
+            with conn:
+                conn.execute(
+                    "UPDATE projects SET local_path = ? WHERE id = ?",
+                    (local_path, project_id),
+                )
+                names = [name for _, _, name, _ in jobs]
+                conn.execute(
+                    "DELETE FROM files WHERE project_id = ? AND name NOT IN"
+                    f" ({', '.join('?' * len(names))})",
+                    (project_id, *names),
+                )
+                for url, path, name, sha256 in jobs:
+                    conn.execute(
+                        "INSERT INTO files (project_id, name, url, sha256, local_path)"
+                        " VALUES (?, ?, ?, ?, ?)"
+                        " ON CONFLICT (project_id, name) DO UPDATE SET"
+                        " url = excluded.url, sha256 = excluded.sha256,"
+                        " local_path = excluded.local_path",
+                        (project_id, name, url, sha256, path),
+                    )
+        finally:
+            conn.close()
+
+    def files(self, project_id: int) -> list:
+        rows = self.execute(
+            "SELECT name, url, sha256, local_path, downloaded_at FROM files"
+            " WHERE project_id = ? ORDER BY name",
+            (project_id,),
+        )
+        return [
+            {
+                "name": name,
+                "file": url,
+                "sha256": sha256,
+                "local_path": local_path,
+                "downloaded_at": downloaded_at,
+            }
+            for name, url, sha256, local_path, downloaded_at in rows
+        ]
+
+    def mark_downloaded(self, paths: list):
+        now = time.time()
+        conn = self.connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "UPDATE files SET downloaded_at = ? WHERE local_path = ?",
+                    [(now, path) for path in paths],
+                )
+                conn.execute(
+                    "UPDATE projects SET downloaded_at = ? WHERE id IN"
+                    " (SELECT project_id FROM files WHERE downloaded_at = ?)",
+                    (now, now),
+                )
+        finally:
+            conn.close()
+
+    def mark_synced(self, project_id: int):
+        self.execute(
+            "UPDATE projects SET synced_at = ? WHERE id = ?", (time.time(), project_id)
+        )
+
+    def clear(self):
+        conn = self.connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM files")
+                conn.execute("DELETE FROM projects")
+                conn.execute("DELETE FROM profile")
+        finally:
+            conn.close()
@@ -0,0 +1,108 @@
+import os
+import uuid
+
+
+class MultipartFileStream:
+    """multipart/form-data body that streams a file from disk.
+
+    requests normally assembles the whole multipart body in memory; this
+    object instead reads the file block by block as the connection sends it,
+    while still advertising an exact Content-Length. Peak memory is one block
+    no matter how large the file is.
+    """
+
+    BLOCK_SIZE = 256 * 1024
+
+    def __init__(
+        self,
+        file_path: str,
+        field_name: str = "file",
+        fields: dict = None,
+        progress=None,
+        limiter=None,
+        fileobj=None,
+        file_size=None,
+        boundary=None,
+    ):
+        """``fileobj``/``file_size`` stream another source under file_path's name.
+
+        Pass the same ``boundary`` to rebuild an identical body for a retry.
+        """
+        self.file_path = file_path
+        self.fileobj = fileobj
+        self.boundary = boundary or uuid.uuid4().hex
+        self.progress = progress
+        self.limiter = limiter
+
+        head = b""
+        for name, value in (fields or {}).items():
+            head += (
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                f"{value}\r\n"
+            ).encode("utf-8")
+        head += (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field_name}"; '
+            f'filename="{os.path.basename(file_path)}"\r\n'
+            "Content-Type: application/octet-stream\r\n\r\n"
+        ).encode("utf-8")
+        tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+
+        self.file_size = (
+            file_size if file_size is not None else os.path.getsize(file_path)
+        )
+        self.len = len(head) + self.file_size + len(tail)
+        self.sent = 0
+
+        self._head = head
+        self._tail = tail
+        self._file = None
+        self._stage = 0
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self):
+        return self.len
+
+    def __iter__(self):
+        while True:
+            block = self.read(self.BLOCK_SIZE)
+            if not block:
+                return
+            yield block
+
+    def read(self, size=-1) -> bytes:
+        if size is None or size < 0:
+            size = self.BLOCK_SIZE
+
+        if self._stage == 0:
+            data, self._head = self._head[:size], self._head[size:]
+            if not self._head:
+                self._stage = 1
+                self._file = self.fileobj or open(self.file_path, "rb")
+        elif self._stage == 1:
+            data = self._file.read(size)
+            if not data:
+                self._file.close()
+                self._stage = 2
+                return self.read(size)
+        elif self._stage == 2:
+            data, self._tail = self._tail[:size], self._tail[size:]
+            if not self._tail:
+                self._stage = 3
+        else:
+            return b""
+
+        if self.limiter:
+            self.limiter.consume(len(data))
+        self.sent += len(data)
+        if self.progress:
+            self.progress(self.sent, self.len)
+        return data
+
+    def close(self):
+        if self._file and not self._file.closed:
+            self._file.close()
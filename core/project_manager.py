@@ -6,6 +6,18 @@ class ProjectSettingsManager:
     """The Settings of the TopMap Sync Settings"""
 
     ROOT_KEY = "TopMap/project_root"
+    UPLOAD_WORKERS_KEY = "TopMap/upload_workers"
+    UPLOAD_BANDWIDTH_KEY = "TopMap/upload_bandwidth"
+    DOWNLOAD_WORKERS_KEY = "TopMap/download_workers"
+    UPLOAD_ENCODING_KEY = "TopMap/upload_encoding"
+    VECTOR_BATCH_KEY = "TopMap/vector_batch_size"
+    RELOAD_AFTER_CONTAINERIZE_KEY = "TopMap/reload_after_containerize"
+    LOG_TIMINGS_KEY = "TopMap/log_timings"
+
+    # Stored in the .qgz itself so each project keeps its own choice
+    PROJECT_SCOPE = "TopMapSync"
+    RASTER_PROFILE_ENTRY = "raster_profile"
+    WEB_LAYERS_ENTRY = "web_layers"
 
     @classmethod
     def get_root_dir(cls):
@@ -23,3 +35,63 @@ class ProjectSettingsManager:
         if not root:
             return None
         return os.path.join(root, project_name)
+
+    @classmethod
+    def get_upload_workers(cls):
+        settings = QgsSettings()
+        return int(settings.value(cls.UPLOAD_WORKERS_KEY, 4))
+
+    @classmethod
+    def get_upload_bandwidth(cls):
+        """Upload cap in bytes per second, 0 for unlimited."""
+        settings = QgsSettings()
+        return int(settings.value(cls.UPLOAD_BANDWIDTH_KEY, 0))
+
+    @classmethod
+    def get_download_workers(cls):
+        settings = QgsSettings()
+        return int(settings.value(cls.DOWNLOAD_WORKERS_KEY, 6))
+
+    @classmethod
+    def get_upload_encoding(cls):
+        """Content-Encoding for uploads ("gzip", "zstd"), None to send raw bytes."""
+        settings = QgsSettings()
+        return settings.value(cls.UPLOAD_ENCODING_KEY, "") or None
+
+    @classmethod
+    def get_vector_batch_size(cls):
+        """Features written per transaction when containerizing vectors."""
+        settings = QgsSettings()
+        return max(1, int(settings.value(cls.VECTOR_BATCH_KEY, 10000)))
+
+    @classmethod
+    def get_reload_after_containerize(cls):
+        """Re-read the project from disk after containerizing (off by default)."""
+        settings = QgsSettings()
+        return settings.value(cls.RELOAD_AFTER_CONTAINERIZE_KEY, False, type=bool)
+
+    @classmethod
+    def get_log_timings(cls):
+        """Log the startup timing breakdown to the message log (off by default)."""
+        settings = QgsSettings()
+        return settings.value(cls.LOG_TIMINGS_KEY, False, type=bool)
+
+    @classmethod
+    def get_raster_profile(cls, project):
+        """Name of the RasterOutputProfile preset used by this project."""
+        value, _ = project.readEntry(cls.PROJECT_SCOPE, cls.RASTER_PROFILE_ENTRY, "")
+        return value or None
+
+    @classmethod
+    def set_raster_profile(cls, project, name):
+        project.writeEntry(cls.PROJECT_SCOPE, cls.RASTER_PROFILE_ENTRY, name)
+
+    @classmethod
+    def get_web_layer_policy(cls, project):
+        """How containerize treats web layers: "reference" (default) or "cache"."""
+        value, _ = project.readEntry(cls.PROJECT_SCOPE, cls.WEB_LAYERS_ENTRY, "")
+        return value or "reference"
+
+    @classmethod
+    def set_web_layer_policy(cls, project, policy):
+        project.writeEntry(cls.PROJECT_SCOPE, cls.WEB_LAYERS_ENTRY, policy)
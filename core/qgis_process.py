@@ -1,150 +1,641 @@
 import os
+import shutil
+import time
+from PyQt5.QtXml import QDomDocument
 from qgis.core import (
+    QgsFeature,
     QgsProject,
     QgsRasterLayer,
     QgsRasterPipe,
     QgsRasterFileWriter,
     QgsVectorLayer,
+    QgsVectorLayerFeatureSource,
     QgsVectorFileWriter,
+    QgsFeatureRequest,
 )
 
+from .gpkg_session import GeoPackageExportSession
+from .layer_fingerprint import LayerFingerprints, layer_fingerprint
+from .layer_sources import CACHE, EXPORT, cache_extent, cache_size, layer_policy
+from .project_manager import ProjectSettingsManager
+from .raster_profile import RasterOutputProfile
+
+
+# Rough peak memory of one GTiff export (GDAL block cache + pipe buffers)
+RASTER_EXPORT_MEMORY = 512 * 1024 * 1024
+
+
+def available_memory():
+    """Best-effort available physical memory in bytes, None if unknown."""
+    if os.name == "nt":
+        return windows_available_memory()
+    try:
+        with open("/proc/meminfo", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def windows_available_memory():
+    import ctypes
+    from ctypes import wintypes
+
+    class MEMORYSTATUSEX(ctypes.Structure):
+        _fields_ = [
+            ("dwLength", wintypes.DWORD),
+            ("dwMemoryLoad", wintypes.DWORD),
+            ("ullTotalPhys", ctypes.c_ulonglong),
+            ("ullAvailPhys", ctypes.c_ulonglong),
+            ("ullTotalPageFile", ctypes.c_ulonglong),
+            ("ullAvailPageFile", ctypes.c_ulonglong),
+            ("ullTotalVirtual", ctypes.c_ulonglong),
+            ("ullAvailVirtual", ctypes.c_ulonglong),
+            ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+        ]
+
+    status = MEMORYSTATUSEX()
+    status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+    try:
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys
+    except (AttributeError, OSError):
+        pass
+    return None
+
+
+def raster_export_workers(job_count: int) -> int:
+    """How many rasters to export at once, bounded by cores and free memory."""
+    workers = max(1, (os.cpu_count() or 2) - 1)
+    memory = available_memory()
+    if memory:
+        workers = min(workers, max(1, memory // RASTER_EXPORT_MEMORY))
+    else:
+        # Unknown free memory: don't bet on more than a couple of exports
+        workers = min(workers, 2)
+    return max(1, min(workers, job_count))
+
+
+def unique_names(layers, base_name, owns=None) -> dict:
+    """Layer id -> output name, with ``_2``, ``_3``, ... added on collisions.
+
+    Layers for which ``owns(layer, name)`` is true already are that output
+    and keep the name; the others are numbered in project order.
+    """
+    def claims_name(layer):
+        return owns is not None and owns(layer, base_name(layer))
+
+    names, taken = {}, set()
+    for layer in sorted(layers, key=lambda l: not claims_name(l)):
+        base = name = base_name(layer)
+        number = 2
+        while name.lower() in taken:
+            name = f"{base}_{number}"
+            number += 1
+        taken.add(name.lower())
+        names[layer.id()] = name
+    return names
+
+
+def link_or_copy(source: str, destination: str):
+    """Put a copy of ``source`` at ``destination`` as cheaply as possible.
+
+    Tries a copy-on-write reflink first (Btrfs, XFS, APFS-style clones), then
+    a hard link, then a regular copy.
+    """
+    tmp_path = f"{destination}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    try:
+        import fcntl
+
+        FICLONE = 0x40049409
+        with open(source, "rb") as src, open(tmp_path, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except (ImportError, OSError):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            os.link(source, tmp_path)
+        except OSError:
+            shutil.copyfile(source, tmp_path)
+
+    os.replace(tmp_path, destination)
+
+
+def swap_layer(project: QgsProject, old_id: str, new_layer):
+    """Replace a map layer with ``new_layer`` at the same layer tree position."""
+    swaps = LayerSwapBatch(project)
+    swaps.swap(old_id, new_layer)
+    swaps.commit()
+
+
+class LayerSwapBatch:
+    """Layer swaps collected and applied to the project in one go.
+
+    All new layers are registered with a single ``addMapLayers`` call and all
+    old ones dropped with a single ``removeMapLayers`` call, so the project,
+    layer tree and canvas see one batch instead of one update per layer.
+    """
+
+    def __init__(self, project: QgsProject):
+        self.project = project
+        self.swaps = []
+
+    def __len__(self):
+        return len(self.swaps)
+
+    def swap(self, old_id: str, new_layer):
+        self.swaps.append((old_id, new_layer))
+
+    def commit(self):
+        if not self.swaps:
+            return
+        swaps, self.swaps = self.swaps, []
+        root = self.project.layerTreeRoot()
+
+        self.project.addMapLayers([new_layer for _, new_layer in swaps], False)
+        for old_id, new_layer in swaps:
+            # Maintain tree position
+            old_node = root.findLayer(old_id)
+            if old_node:
+                parent = old_node.parent()
+                parent.insertLayer(parent.children().index(old_node), new_layer)
+            else:
+                root.addLayer(new_layer)
+        self.project.removeMapLayers([old_id for old_id, _ in swaps])
+
 
 class QgisRasterProcessor:
-    def __init__(self, project: QgsProject, project_folder: str):
+    """Export project rasters to GeoTIFFs in the project folder.
+
+    Work is split so it can run from a QgsTask: ``prepare_jobs`` and
+    ``apply`` touch the project and must run on the main thread, ``export``
+    only works on cloned providers and is safe in a worker thread.
+    """
+
+    def __init__(
+        self, project: QgsProject, project_folder: str, profile=None, fingerprints=None
+    ):
         self.project = project
         self.project_folder = project_folder
+        self.profile = profile or RasterOutputProfile(
+            ProjectSettingsManager.get_raster_profile(project)
+        )
+        self.fingerprints = fingerprints or LayerFingerprints(project_folder)
+        self.web_policy = ProjectSettingsManager.get_web_layer_policy(project)
 
     def process_rasters(self):
         errors = []
+        swaps = LayerSwapBatch(self.project)
+        for job in self.prepare_jobs(errors):
+            try:
+                self.export(job)
+                self.apply(job, swaps)
+            except Exception as e:
+                errors.append(f"Raster {job['name']}: {e}")
+        swaps.commit()
+        self.fingerprints.save()
+        return errors
+
+    def prepare_jobs(self, errors: list) -> list:
+        jobs = []
         rasters = [
             l
             for l in self.project.mapLayers().values()
             if isinstance(l, QgsRasterLayer)
         ]
+        names = unique_names(rasters, self.output_name, self.is_own_file)
+        # Captured here: the project must not be touched from the workers
+        transform_context = self.project.transformContext()
 
         for raster in rasters:
             try:
-                safe_name = raster.name().replace(" ", "_")
+                policy = layer_policy(raster, self.web_policy)
+                extent = cache_extent(self.project, raster) if policy == CACHE else None
+                if policy != EXPORT and extent is None:
+                    # Web services stay references: never pull the whole
+                    # service through writeRaster
+                    continue
+
+                safe_name = names[raster.id()]
                 style_path = os.path.join(self.project_folder, f"{safe_name}.qml")
 
                 # Save style
                 raster.saveNamedStyle(style_path)
 
-                # Export raster
-                absolute_new_path = self.save_raster_to_project(raster)
-                new_raster = QgsRasterLayer(absolute_new_path, raster.name())
-
-                if not new_raster.isValid():
-                    raise RuntimeError(
-                        f"Failed to load exported raster: {absolute_new_path}"
-                    )
+                provider = raster.dataProvider()
+                output_path = os.path.join(self.project_folder, f"{safe_name}.tif")
+                source_path = self.local_source_path(raster)
+                data_type, band_count = provider.dataType(1), provider.bandCount()
 
-                # Restore raster style
-                new_raster.loadNamedStyle(style_path)
-
-                # Maintain tree position
-                old_id = raster.id()
-                root = self.project.layerTreeRoot()
-                old_node = root.findLayer(old_id)
+                if extent is not None:
+                    x_size, y_size = cache_size(extent)
+                else:
+                    extent = provider.extent()
+                    x_size, y_size = provider.xSize(), provider.ySize()
 
-                self.project.addMapLayer(new_raster, False)
+                fingerprint = layer_fingerprint(
+                    raster, extent if policy == CACHE else None
+                )
+                key = f"raster:{os.path.basename(output_path)}"
 
-                if old_node:
-                    parent = old_node.parent()
-                    idx = parent.children().index(old_node)
-                    parent.insertLayer(idx, new_raster)
+                if source_path and self.same_file(source_path, output_path):
+                    # Already containerized: nothing to export or swap
+                    mode = "skip"
+                elif self.fingerprints.unchanged(key, fingerprint, output_path):
+                    # Exported earlier from an unchanged source: just swap
+                    mode = "reuse"
+                elif source_path and self.profile.matches(
+                    source_path, data_type, band_count
+                ):
+                    mode = "copy"
                 else:
-                    root.addLayer(new_raster)
-
-                self.project.removeMapLayer(old_id)
+                    mode = "export"
 
+                jobs.append(
+                    {
+                        "mode": mode,
+                        "key": key,
+                        "fingerprint": fingerprint,
+                        "source_path": source_path,
+                        "layer_id": raster.id(),
+                        "name": raster.name(),
+                        "style_path": style_path,
+                        "output_path": output_path,
+                        "provider": provider.clone() if mode == "export" else None,
+                        "x_size": x_size,
+                        "y_size": y_size,
+                        "extent": extent,
+                        "crs": raster.crs(),
+                        "transform_context": transform_context,
+                        "data_type": data_type,
+                        "band_count": band_count,
+                    }
+                )
             except Exception as e:
                 errors.append(f"Raster {raster.name()}: {e}")
-        return errors
+        return jobs
 
-    def save_raster_to_project(self, raster: QgsRasterLayer) -> str:
-        safe_name = raster.name().replace(" ", "_")
-        output_path = os.path.join(self.project_folder, f"{safe_name}.tif")
-        provider = raster.dataProvider()
-        pipe = QgsRasterPipe()
-        pipe.set(provider.clone())
-        writer = QgsRasterFileWriter(output_path)
-        writer.setOutputFormat("GTiff")
-        writer.writeRaster(
-            pipe, provider.xSize(), provider.ySize(), provider.extent(), raster.crs()
-        )
+    @staticmethod
+    def output_name(raster: QgsRasterLayer) -> str:
+        return raster.name().replace(" ", "_")
+
+    def is_own_file(self, raster: QgsRasterLayer, name: str) -> bool:
+        source_path = self.local_source_path(raster)
+        output_path = os.path.join(self.project_folder, f"{name}.tif")
+        return bool(source_path) and self.same_file(source_path, output_path)
+
+    @staticmethod
+    def local_source_path(raster: QgsRasterLayer):
+        """Path of a plain file-backed GDAL raster, None for anything else."""
+        if raster.providerType() != "gdal":
+            return None
+        path = raster.source().split("|")[0]
+        return path if os.path.isfile(path) else None
+
+    @staticmethod
+    def same_file(path: str, other: str) -> bool:
+        try:
+            return os.path.samefile(path, other)
+        except OSError:
+            return False
+
+    def export(self, job: dict, feedback=None) -> str:
+        """Write the raster of a prepared job; safe to call off the main thread.
+
+        File-based sources already in the target encoding are linked or
+        copied instead of re-encoded, and rasters that already are the
+        project file are left alone.
+        """
+        output_path = job["output_path"]
+        if job["mode"] in ("skip", "reuse"):
+            return output_path
+        if job["mode"] == "copy":
+            link_or_copy(job["source_path"], output_path)
+            return output_path
+
+        # Never write over output_path in place: it may be a hard link to
+        # the source of an earlier copy, or the file being read right now.
+        # Temporary names end in .part so a sync never picks them up.
+        data_type, band_count = job["data_type"], job["band_count"]
+        tmp_path = f"{output_path}.part"
+        convert = self.profile.needs_conversion(data_type, band_count)
+        write_path = f"{output_path}.tiled.part" if convert else tmp_path
+
+        try:
+            pipe = QgsRasterPipe()
+            pipe.set(job["provider"])
+            writer = QgsRasterFileWriter(write_path)
+            self.profile.configure_writer(writer, data_type, band_count)
+            res = writer.writeRaster(
+                pipe,
+                job["x_size"],
+                job["y_size"],
+                job["extent"],
+                job["crs"],
+                job["transform_context"],
+                feedback,
+            )
+            if res != QgsRasterFileWriter.NoError:
+                raise RuntimeError(f"Raster write error: {res}")
+
+            if convert:
+                self.profile.convert(write_path, tmp_path, data_type, band_count)
+        except BaseException:
+            # Failed or canceled: leave no partial raster behind
+            for path in {write_path, tmp_path}:
+                for leftover in (path, f"{path}.aux.xml"):
+                    if os.path.exists(leftover):
+                        os.remove(leftover)
+            raise
+        os.replace(tmp_path, output_path)
         return output_path
 
+    def apply(self, job: dict, swaps: LayerSwapBatch = None):
+        """Swap the exported raster into the project (main thread only).
+
+        With ``swaps`` the swap is only queued; the caller commits the batch.
+        """
+        if job["mode"] == "skip":
+            return
+
+        absolute_new_path = job["output_path"]
+        new_raster = QgsRasterLayer(absolute_new_path, job["name"])
+
+        if not new_raster.isValid():
+            raise RuntimeError(f"Failed to load exported raster: {absolute_new_path}")
+
+        # Restore raster style
+        new_raster.loadNamedStyle(job["style_path"])
+
+        if swaps is not None:
+            swaps.swap(job["layer_id"], new_raster)
+        else:
+            swap_layer(self.project, job["layer_id"], new_raster)
+        self.fingerprints.update(job["key"], job["fingerprint"])
+
 
 class QgisVectorProcessor:
-    def __init__(self, project: QgsProject, project_folder: str):
+    """Export project vector layers as tables of ``data.gpkg``.
+
+    Same prepare / export / apply split as QgisRasterProcessor. Features are
+    read through a QgsVectorLayerFeatureSource snapshot, which is the
+    thread-safe way to iterate a layer from a worker.
+    """
+
+    def __init__(self, project: QgsProject, project_folder: str, fingerprints=None):
         self.project = project
         self.project_folder = project_folder
         self.gpkg_path = os.path.join(self.project_folder, "data.gpkg")
+        self.fingerprints = fingerprints or LayerFingerprints(project_folder)
+        self.web_policy = ProjectSettingsManager.get_web_layer_policy(project)
+        self.batch_size = ProjectSettingsManager.get_vector_batch_size()
+        self.session = GeoPackageExportSession(self.gpkg_path)
 
     def process_vector(self):
         errors = []
+        jobs = self.prepare_jobs(errors)
+        with self.session:
+            for job in jobs:
+                try:
+                    self.export(job)
+                except Exception as e:
+                    job["mode"] = "skip"
+                    errors.append(f"Vector {job['name']}: {str(e)}")
+        swaps = LayerSwapBatch(self.project)
+        for job in jobs:
+            try:
+                self.apply(job, swaps)
+            except Exception as e:
+                errors.append(f"Vector {job['name']}: {str(e)}")
+        swaps.commit()
+        self.fingerprints.save()
+        return errors
+
+    def prepare_jobs(self, errors: list) -> list:
+        jobs = []
         vectors = [
             l
             for l in self.project.mapLayers().values()
             if isinstance(l, QgsVectorLayer)
         ]
+        names = unique_names(vectors, self.output_name, self.is_own_table)
+        # Captured here: the project must not be touched from the workers
+        transform_context = self.project.transformContext()
 
-        # Determine if we need to start a fresh file or append
-        first_layer = True
+        # Tables of layers that no longer exist are dropped by the session;
+        # anything a layer still reads from stays until it is swapped out
+        read_tables = map(self.gpkg_table, self.project.mapLayers().values())
+        self.session.owned_tables = set(names.values()) | set(filter(None, read_tables))
+        self.fingerprints.retain("vector:", names.values())
 
         for vector in vectors:
             try:
-                table_name = vector.name().replace(" ", "_").lower()
-
-                options = QgsVectorFileWriter.SaveVectorOptions()
-                options.driverName = "GPKG"
-                options.layerName = table_name
-
-                # FIX: If it's the first layer, recreate the whole file.
-                # If not, just overwrite the specific layer inside the file.
-                if first_layer:
-                    options.actionOnExistingFile = (
-                        QgsVectorFileWriter.CreateOrOverwriteFile
-                    )
-                    first_layer = False
+                policy = layer_policy(vector, self.web_policy)
+                extent = cache_extent(self.project, vector) if policy == CACHE else None
+                if policy != EXPORT and extent is None:
+                    # WFS and other services stay references
+                    continue
+
+                table_name = names[vector.id()]
+                fingerprint = layer_fingerprint(vector, extent)
+                key = f"vector:{table_name}"
+
+                if self.is_own_table(vector, table_name):
+                    # Already lives in data.gpkg; rewriting would read and
+                    # overwrite the same table
+                    mode = "skip"
+                elif self.fingerprints.unchanged(
+                    key, fingerprint, self.gpkg_path, table_name
+                ):
+                    mode = "reuse"
                 else:
-                    options.actionOnExistingFile = (
-                        QgsVectorFileWriter.CreateOrOverwriteLayer
-                    )
-
-                context = self.project.transformContext()
-                # Use V3 to avoid unpacking error
-                res, err, _, _ = QgsVectorFileWriter.writeAsVectorFormatV3(
-                    vector, self.gpkg_path, context, options
+                    mode = "export"
+
+                jobs.append(
+                    {
+                        "mode": mode,
+                        "key": key,
+                        "fingerprint": fingerprint,
+                        "layer_id": vector.id(),
+                        "name": vector.name(),
+                        "table_name": table_name,
+                        "source": (
+                            QgsVectorLayerFeatureSource(vector)
+                            if mode == "export"
+                            else None
+                        ),
+                        "fields": vector.fields(),
+                        "wkb_type": vector.wkbType(),
+                        "crs": vector.crs(),
+                        "transform_context": transform_context,
+                        "filter_rect": extent,
+                        "feature_count": vector.featureCount(),
+                        "style": self.style_xml(vector) if mode == "export" else None,
+                    }
                 )
+            except Exception as e:
+                errors.append(f"Vector {vector.name()}: {str(e)}")
+        return jobs
 
-                if res != QgsVectorFileWriter.NoError:
-                    raise RuntimeError(f"Write error: {err}")
+    @staticmethod
+    def output_name(vector: QgsVectorLayer) -> str:
+        return vector.name().replace(" ", "_").lower()
 
-                # Load new layer and save style to DB
-                source_path = f"{self.gpkg_path}|layername={table_name}"
-                new_vector = QgsVectorLayer(source_path, vector.name(), "ogr")
+    @staticmethod
+    def style_xml(vector: QgsVectorLayer) -> str:
+        doc = QDomDocument()
+        vector.exportNamedStyle(doc)
+        return doc.toString()
 
-                if new_vector.isValid():
-                    # Save style directly into the GPKG
-                    new_vector.saveStyleToDatabase(table_name, "", True, "")
+    def is_own_table(self, vector: QgsVectorLayer, table_name: str) -> bool:
+        return self.gpkg_table(vector) == table_name
 
-                    # Swap logic
-                    old_id = vector.id()
-                    self.project.addMapLayer(new_vector, False)
+    def gpkg_table(self, layer):
+        """The data.gpkg table a layer reads from, None for other sources."""
+        if layer.providerType() != "ogr":
+            return None
+        path, _, options = layer.source().partition("|")
+        try:
+            if not os.path.samefile(path, self.gpkg_path):
+                return None
+        except OSError:
+            return None
+        for option in options.split("|"):
+            if option.startswith("layername="):
+                return option.split("=", 1)[1]
+        return None
 
-                    # Move position in tree
-                    root = self.project.layerTreeRoot()
-                    old_node = root.findLayer(old_id)
-                    if old_node:
-                        old_node.parent().insertLayer(
-                            old_node.parent().children().index(old_node), new_vector
-                        )
+    def export(self, job: dict, feedback=None, progress=None):
+        """Write one table into data.gpkg; safe to call off the main thread.
 
-                    self.project.removeMapLayer(old_id)
+        Only the job's own table is replaced, so tables of unchanged layers
+        stay byte-for-byte as they were. Features are streamed from the
+        source and committed ``batch_size`` at a time, so memory stays flat
+        however large the layer is. ``progress(written, total, rate)`` is
+        called after every batch, ``rate`` in features per second. Run it
+        inside ``self.session`` so the table gets bulk-load settings and a
+        spatial index.
+        """
+        if job["mode"] != "export":
+            return
 
-            except Exception as e:
-                errors.append(f"Vector {vector.name()}: {str(e)}")
+        table_name = job["table_name"]
+        self.create_table(job)
 
-        return errors
+        # The OGR provider wraps each addFeatures call in one transaction
+        table = QgsVectorLayer(f"{self.gpkg_path}|layername={table_name}", "", "ogr")
+        if not table.isValid():
+            raise RuntimeError(f"Failed to open new table: {table_name}")
+        provider = table.dataProvider()
+
+        out_fields = provider.fields()
+        mapping = [
+            (idx, out_fields.indexOf(field.name()))
+            for idx, field in enumerate(job["fields"])
+            if out_fields.indexOf(field.name()) >= 0
+        ]
+
+        request = QgsFeatureRequest()
+        if job["filter_rect"] is not None:
+            # Cached web layer: only the features in the project extent
+            request.setFilterRect(job["filter_rect"])
+
+        total = job["feature_count"]
+        written = 0
+        started = time.monotonic()
+        batch = []
+
+        def flush():
+            nonlocal written
+            if not provider.addFeatures(batch):
+                errors = "; ".join(provider.errors()) or "addFeatures failed"
+                raise RuntimeError(f"Write error: {errors}")
+            written += len(batch)
+            batch.clear()
+            if progress:
+                elapsed = max(time.monotonic() - started, 1e-6)
+                progress(written, total, written / elapsed)
+
+        for feature in job["source"].getFeatures(request):
+            out = QgsFeature(out_fields)
+            attributes = feature.attributes()
+            for src_idx, dst_idx in mapping:
+                out.setAttribute(dst_idx, attributes[src_idx])
+            if feature.hasGeometry():
+                out.setGeometry(feature.geometry())
+            batch.append(out)
+
+            if len(batch) >= self.batch_size:
+                flush()
+                if feedback and feedback.isCanceled():
+                    raise RuntimeError("Canceled")
+        if batch:
+            flush()
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        print(
+            f"Exported {written} features of {job['name']} "
+            f"({written / elapsed:.0f} features/s)"
+        )
+
+        # Store the original layer's style as the table's default style
+        style = QDomDocument()
+        style.setContent(job["style"])
+        table.importNamedStyle(style)
+        table.saveStyleToDatabase(table_name, "", True, "")
+
+    def create_table(self, job: dict):
+        """Create (or replace) the empty GeoPackage table for a job."""
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = "GPKG"
+        options.layerName = job["table_name"]
+        # Creates data.gpkg if missing, otherwise replaces just this table
+        options.actionOnExistingFile = QgsVectorFileWriter.CreateOrOverwriteLayer
+        options.layerOptions = self.session.layer_options()
+
+        writer = QgsVectorFileWriter.create(
+            self.gpkg_path,
+            job["fields"],
+            job["wkb_type"],
+            job["crs"],
+            job["transform_context"],
+            options,
+        )
+        try:
+            if writer.hasError() != QgsVectorFileWriter.NoError:
+                raise RuntimeError(f"Write error: {writer.errorMessage()}")
+        finally:
+            # Deleting the writer closes the GeoPackage layer
+            del writer
+        self.session.add_table(job["table_name"])
+
+    def apply(self, job: dict, swaps: LayerSwapBatch = None):
+        """Load the written table and swap it in (main thread only).
+
+        The table's default style was stored in the GeoPackage by ``export``
+        and is picked up when the layer loads. With ``swaps`` the swap is
+        only queued; the caller commits the batch.
+        """
+        if job["mode"] == "skip":
+            return
+
+        table_name = job["table_name"]
+        source_path = f"{self.gpkg_path}|layername={table_name}"
+        new_vector = QgsVectorLayer(source_path, job["name"], "ogr")
+
+        if not new_vector.isValid():
+            raise RuntimeError(f"Failed to load exported table: {table_name}")
+
+        if swaps is not None:
+            swaps.swap(job["layer_id"], new_vector)
+        else:
+            swap_layer(self.project, job["layer_id"], new_vector)
+        self.fingerprints.update(job["key"], job["fingerprint"])
@@ -0,0 +1,176 @@
+import os
+
+from qgis.core import Qgis, QgsRaster, QgsRasterFileWriter
+
+from .compression import TIFF_EXTENSIONS, tiff_is_compressed, tiff_is_tiled
+
+try:
+    from osgeo import gdal
+except ImportError:  # COG conversion falls back to tiled GTiff
+    gdal = None
+
+
+FLOAT_TYPES = (Qgis.Float32, Qgis.Float64, Qgis.CFloat32, Qgis.CFloat64)
+LOSSY_COMPRESSIONS = ("JPEG", "WEBP")
+
+
+class RasterOutputProfile:
+    """How containerized rasters are encoded on disk.
+
+    ``layout`` is "cog" (Cloud-Optimized GeoTIFF) or "tiled" (tiled GTiff
+    with internal overviews). QgsRasterFileWriter cannot write COG directly,
+    so COGs are rendered to a temporary tiled GTiff and converted by GDAL.
+    Lossy JPEG/WEBP is only used for 8-bit RGB(A) imagery; other rasters
+    fall back to DEFLATE so values stay exact. JPEG has no alpha channel, so
+    the alpha band of RGBA imagery is turned into an internal mask by GDAL.
+    """
+
+    PRESETS = {
+        "cog_deflate": ("cog", "DEFLATE"),
+        "cog_zstd": ("cog", "ZSTD"),
+        "cog_jpeg": ("cog", "JPEG"),
+        "cog_webp": ("cog", "WEBP"),
+        "tiled_lzw": ("tiled", "LZW"),
+        "tiled_deflate": ("tiled", "DEFLATE"),
+    }
+    DEFAULT = "cog_deflate"
+
+    BLOCK_SIZE = 512
+    OVERVIEW_LEVELS = [2, 4, 8, 16, 32]
+    LOSSY_QUALITY = 85
+
+    def __init__(self, name: str = None):
+        if name not in self.PRESETS:
+            name = self.DEFAULT
+        self.name = name
+        self.layout, self.compression = self.PRESETS[name]
+
+    def compression_for(self, data_type, band_count: int) -> str:
+        if self.compression in LOSSY_COMPRESSIONS and not (
+            data_type == Qgis.Byte and band_count in (3, 4)
+        ):
+            return "DEFLATE"
+        if self.compression == "JPEG" and band_count == 4 and gdal is None:
+            # Moving alpha to a mask needs GDAL
+            return "DEFLATE"
+        return self.compression
+
+    def alpha_to_mask(self, data_type, band_count: int) -> bool:
+        """Whether band 4 is alpha that has to become a mask (RGBA as JPEG)."""
+        return band_count == 4 and self.compression_for(data_type, band_count) == "JPEG"
+
+    def creation_options(self, data_type, band_count: int, layout=None) -> list:
+        layout = layout or self.layout
+        compression = self.compression_for(data_type, band_count)
+        options = [f"COMPRESS={compression}"]
+
+        if compression in LOSSY_COMPRESSIONS:
+            if layout == "cog":
+                options.append(f"QUALITY={self.LOSSY_QUALITY}")
+            elif compression == "JPEG":
+                options.append(f"JPEG_QUALITY={self.LOSSY_QUALITY}")
+                if band_count == 3:
+                    options.append("PHOTOMETRIC=YCBCR")
+            else:
+                options.append(f"WEBP_LEVEL={self.LOSSY_QUALITY}")
+        else:
+            predictor = 3 if data_type in FLOAT_TYPES else 2
+            options.append(f"PREDICTOR={predictor}")
+
+        if layout == "cog":
+            options += [
+                f"BLOCKSIZE={self.BLOCK_SIZE}",
+                "OVERVIEWS=AUTO",
+                "BIGTIFF=IF_SAFER",
+            ]
+        else:
+            options += [
+                "TILED=YES",
+                f"BLOCKXSIZE={self.BLOCK_SIZE}",
+                f"BLOCKYSIZE={self.BLOCK_SIZE}",
+                "BIGTIFF=IF_SAFER",
+            ]
+        return options
+
+    def configure_writer(self, writer: QgsRasterFileWriter, data_type, band_count):
+        """Set up the QgsRasterFileWriter that renders the raster to GTiff."""
+        writer.setOutputFormat("GTiff")
+        if self.needs_conversion(data_type, band_count):
+            # Uncompressed intermediate: fast to write and encoded only once
+            writer.setCreateOptions(["TILED=YES", "BIGTIFF=IF_SAFER"])
+            return
+
+        writer.setCreateOptions(
+            self.creation_options(data_type, band_count, layout="tiled")
+        )
+        writer.setBuildPyramidsFlag(QgsRaster.PyramidsFlagYes)
+        writer.setPyramidsList(self.OVERVIEW_LEVELS)
+        writer.setPyramidsFormat(QgsRaster.PyramidsInternal)
+        writer.setPyramidsResampling("AVERAGE")
+
+    def needs_conversion(self, data_type, band_count: int) -> bool:
+        """Whether the written GTiff still has to go through ``convert``."""
+        return self.alpha_to_mask(data_type, band_count) or self.writes_cog()
+
+    def writes_cog(self) -> bool:
+        # GDAL older than 3.1 has no COG driver; tiled GTiff is the fallback
+        return (
+            self.layout == "cog"
+            and gdal is not None
+            and gdal.GetDriverByName("COG") is not None
+        )
+
+    def convert(self, tiled_path: str, output_path: str, data_type, band_count):
+        """Re-encode the intermediate GTiff with GDAL (COG driver for "cog")."""
+        cog = self.writes_cog()
+        layout = "cog" if cog else "tiled"
+        kwargs = {}
+        if self.alpha_to_mask(data_type, band_count):
+            kwargs = {"bandList": [1, 2, 3], "maskBand": 4}
+            band_count = 3
+        options = self.creation_options(data_type, band_count, layout=layout)
+
+        gdal.SetThreadLocalConfigOption("GDAL_TIFF_INTERNAL_MASK", "YES")
+        try:
+            result = gdal.Translate(
+                output_path,
+                tiled_path,
+                format="COG" if cog else "GTiff",
+                creationOptions=options,
+                **kwargs,
+            )
+        finally:
+            gdal.SetThreadLocalConfigOption("GDAL_TIFF_INTERNAL_MASK", None)
+        if result is None:
+            raise RuntimeError(f"Raster conversion failed: {gdal.GetLastErrorMsg()}")
+        if not cog:
+            result.BuildOverviews("AVERAGE", self.OVERVIEW_LEVELS)
+        result = None  # close the dataset so GDAL flushes it
+        os.remove(tiled_path)
+
+    def matches(self, path: str, data_type, band_count) -> bool:
+        """Whether an existing GeoTIFF is already encoded the way we would write it."""
+        if not path.lower().endswith(TIFF_EXTENSIONS):
+            return False
+        if gdal is None:
+            # Without GDAL we can only see that it is compressed at all
+            return tiff_is_compressed(path)
+
+        dataset = gdal.Open(path)
+        if dataset is None or dataset.GetDriver().ShortName != "GTiff":
+            return False
+        structure = dataset.GetMetadata("IMAGE_STRUCTURE") or {}
+        compression = structure.get("COMPRESSION", "").upper()
+        expected = self.compression_for(data_type, band_count)
+        if expected == "JPEG" and compression == "YCBCR JPEG":
+            compression = "JPEG"
+        if compression != expected:
+            return False
+
+        if self.layout == "cog":
+            return structure.get("LAYOUT", "").upper() == "COG"
+        if "TILED" in structure:
+            return structure["TILED"].upper() == "YES"
+        # GTiff does not always report it; the TileWidth tag settles it, as a
+        # tile may be wider than a small raster and a strip spans the row
+        return tiff_is_tiled(path)
@@ -0,0 +1,79 @@
+import copy
+import threading
+import time
+
+
+class ResponseCache:
+    """Small in-memory cache for JSON GET responses of the TopMap API.
+
+    Entries are served directly while younger than ``ttl`` seconds. Older
+    entries are revalidated with If-None-Match / If-Modified-Since so an
+    unchanged resource costs a 304 instead of a full body.
+    """
+
+    def __init__(self, ttl: float = 60):
+        self.ttl = ttl
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    def get(self, url: str):
+        """Return the cached entry for ``url`` or None."""
+        with self.lock:
+            return self.entries.get(url)
+
+    def is_fresh(self, entry: dict) -> bool:
+        return time.monotonic() - entry["stored_at"] < self.ttl
+
+    def validators(self, entry: dict) -> dict:
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url: str, response):
+        data = response.json()
+        with self.lock:
+            self.entries[url] = {
+                "data": data,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "stored_at": time.monotonic(),
+            }
+        return copy.deepcopy(data)
+
+    def touch(self, url: str):
+        """Mark a revalidated (304) entry as fresh again and return its data."""
+        with self.lock:
+            entry = self.entries[url]
+            entry["stored_at"] = time.monotonic()
+            self.revalidated += 1
+            return copy.deepcopy(entry["data"])
+
+    def hit(self, entry: dict):
+        with self.lock:
+            self.hits += 1
+            return copy.deepcopy(entry["data"])
+
+    def miss(self):
+        with self.lock:
+            self.misses += 1
+
+    def invalidate(self, prefix: str = ""):
+        """Drop every entry whose URL starts with ``prefix`` (all by default)."""
+        with self.lock:
+            for url in [u for u in self.entries if u.startswith(prefix)]:
+                del self.entries[url]
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidated": self.revalidated,
+                "entries": len(self.entries),
+            }
@@ -0,0 +1,96 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without touching the network while the backend is considered down."""
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter for transient API failures."""
+
+    IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+    RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+    def __init__(self, max_attempts=4, backoff_base=0.5, backoff_max=30):
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def can_retry(self, method: str, idempotent=None) -> bool:
+        if idempotent is not None:
+            return idempotent
+        return method.upper() in self.IDEMPOTENT_METHODS
+
+    def delay(self, attempt: int, response=None) -> float:
+        """Seconds to wait before retry number ``attempt`` (starting at 1)."""
+        retry_after = self.retry_after(response)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+    @staticmethod
+    def retry_after(response):
+        if response is None:
+            return None
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        if value.strip().isdigit():
+            return float(value)
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    """Stop calling the backend after repeated failures.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail immediately for ``reset_timeout`` seconds; then a single trial
+    call is let through to decide whether to close it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    def before_call(self):
+        with self.lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError("TopMap server unavailable, try again later")
+            if self.trial_running:
+                raise CircuitOpenError("TopMap server unavailable, try again later")
+            self.trial_running = True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def release_trial(self):
+        """End a trial call that neither proved nor disproved the backend."""
+        with self.lock:
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
@@ -0,0 +1,109 @@
+import os
+import json
+import hashlib
+
+
+class SyncManifest:
+    """Per-project record of what was last uploaded to TopMap.
+
+    Stored as a small JSON file inside the project folder so that a sync can
+    skip files that have not changed since their last successful upload.
+    """
+
+    FILE_NAME = ".topmap_manifest.json"
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, project_folder: str):
+        self.project_folder = project_folder
+        self.path = os.path.join(project_folder, self.FILE_NAME)
+        self.entries = {}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            self.entries = {}
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("files", {})
+        except (OSError, ValueError) as e:
+            # A broken manifest only costs us a full upload, never a failed sync
+            print(f"Ignoring unreadable sync manifest {self.path}: {e}")
+            self.entries = {}
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"files": self.entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    @classmethod
+    def file_hash(cls, full_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(full_path, "rb") as f:
+            for chunk in iter(lambda: f.read(cls.HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def needs_upload(self, rel_path: str, full_path: str) -> bool:
+        """Return True when the file differs from its last uploaded version.
+
+        Size and mtime are compared first; the file is only hashed when the
+        size matches but the mtime moved (e.g. a save that wrote identical bytes).
+        """
+        entry = self.entries.get(rel_path)
+        if not entry:
+            return True
+
+        stat = os.stat(full_path)
+        if stat.st_size != entry.get("size"):
+            return True
+        if stat.st_mtime_ns == entry.get("mtime_ns"):
+            return False
+
+        if self.file_hash(full_path) != entry.get("sha256"):
+            return True
+
+        # Same content, newer timestamp: remember it so we don't hash again
+        entry["mtime_ns"] = stat.st_mtime_ns
+        return False
+
+    def record_upload(
+        self,
+        rel_path: str,
+        full_path: str,
+        result=None,
+        compression_ratio=None,
+        changeset=False,
+    ):
+        """Remember the local file as uploaded.
+
+        After a full upload the server holds these exact bytes, so
+        ``remote_sha256`` is the local hash. A ``changeset`` upload leaves
+        the server with its own rewrite of the file: only the hash the server
+        reports (if any) is recorded as its version.
+        """
+        stat = os.stat(full_path)
+        sha256 = self.file_hash(full_path)
+        remote_version = None
+        remote_sha256 = None if changeset else sha256
+        if isinstance(result, dict):
+            remote_version = result.get("version", result.get("id"))
+            if changeset:
+                remote_sha256 = result.get("sha256")
+
+        self.entries[rel_path] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": sha256,
+            "remote_sha256": remote_sha256,
+            "remote_version": remote_version,
+            "compression_ratio": compression_ratio,
+        }
+
+    def forget_missing(self):
+        """Drop entries for files that no longer exist locally."""
+        for rel_path in list(self.entries):
+            if not os.path.exists(os.path.join(self.project_folder, rel_path)):
+                del self.entries[rel_path]
@@ -0,0 +1,509 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PyQt5.QtCore import Qt, pyqtSignal
+from qgis.core import QgsRasterBlockFeedback, QgsTask
+
+from .block_delta import BlockSignature
+from .changeset import ChangesetJournal, file_marker
+from .layer_fingerprint import LayerFingerprints
+from .project_manager import ProjectSettingsManager
+from .qgis_process import (
+    LayerSwapBatch,
+    QgisRasterProcessor,
+    QgisVectorProcessor,
+    raster_export_workers,
+)
+from .sync_manifest import SyncManifest
+from .transfer import DownloadEngine, UploadEngine, project_download_jobs
+
+SYNC_EXTENSIONS = (".qgz", ".gpkg", ".qml", ".tif", ".tiff")
+# Temporary rasters that older containerize runs could leave behind
+SYNC_IGNORED_SUFFIXES = (".tmp.tif", ".tiled.tif")
+CHANGESET_FILE = "data.gpkg"
+
+
+class SyncTask(QgsTask):
+    """Upload the changed files of a project folder in the background.
+
+    Emits ``syncFinished(uploaded_count, skipped_count, errors)`` on the main
+    thread once the task completes or is canceled.
+    """
+
+    syncFinished = pyqtSignal(int, int, list)
+
+    def __init__(
+        self,
+        api,
+        project_id,
+        project_folder,
+        max_workers=4,
+        bandwidth=0,
+        encoding=None,
+    ):
+        super().__init__("TopMap Sync: uploading project", QgsTask.CanCancel)
+        self.api = api
+        self.project_id = project_id
+        self.project_folder = project_folder
+        self.max_workers = max_workers
+        self.bandwidth = bandwidth
+        self.encoding = encoding
+
+        self.uploaded_count = 0
+        self.skipped_count = 0
+        self.errors = []
+
+    def run(self):
+        manifest = SyncManifest(self.project_folder)
+        pending = []
+
+        for root, dirs, files in os.walk(self.project_folder):
+            for filename in files:
+                # Only allow project files
+                if not filename.endswith(SYNC_EXTENSIONS):
+                    continue
+                if filename.endswith(SYNC_IGNORED_SUFFIXES):
+                    continue
+
+                full_path = os.path.join(root, filename)
+                rel_path = os.path.relpath(full_path, self.project_folder)
+
+                try:
+                    if manifest.needs_upload(rel_path, full_path):
+                        pending.append((full_path, rel_path))
+                    else:
+                        self.skipped_count += 1
+                except Exception as e:
+                    self.errors.append(f"{rel_path}: {str(e)}")
+
+                if self.isCanceled():
+                    return False
+
+        pending = self.send_changeset(manifest, pending)
+
+        engine = UploadEngine(
+            self.api,
+            max_workers=self.max_workers,
+            max_bandwidth=self.bandwidth,
+            encoding=self.encoding,
+        )
+        uploaded_count, upload_errors = engine.upload_files(
+            self.project_id,
+            pending,
+            on_uploaded=lambda full, rel, result: self.on_uploaded(
+                manifest, full, rel, result
+            ),
+            on_progress=lambda done, total: self.setProgress(100 * done / total),
+            is_canceled=self.isCanceled,
+        )
+        self.uploaded_count += uploaded_count
+        self.errors.extend(upload_errors)
+
+        # Keep the manifest even on cancel so finished uploads are not resent
+        manifest.forget_missing()
+        try:
+            manifest.save()
+        except OSError as e:
+            self.errors.append(f"Sync manifest: {e}")
+
+        return not self.isCanceled()
+
+    def on_uploaded(self, manifest, full_path, rel_path, result, changeset=False):
+        manifest.record_upload(
+            rel_path,
+            full_path,
+            result,
+            self.api.compression_stats.ratio(full_path),
+            changeset=changeset,
+        )
+        if rel_path == CHANGESET_FILE:
+            # Journaled edits are on the server; new ones start from this file
+            ChangesetJournal(self.project_folder).restart(
+                manifest.entries[rel_path]["sha256"], file_marker(full_path)
+            )
+        if changeset:
+            # The server rewrote its copy, so block deltas against the old
+            # signature would no longer line up
+            BlockSignature.discard(full_path)
+
+    def send_changeset(self, manifest, pending):
+        """Replace the data.gpkg upload by its journaled feature edits if possible.
+
+        Only when the journal provably covers every change since the upload
+        the manifest recorded and the server's version of that upload is
+        known; otherwise the file goes up whole.
+        """
+        journal_path = os.path.join(self.project_folder, ChangesetJournal.FILE_NAME)
+        entry = manifest.entries.get(CHANGESET_FILE)
+        item = next((p for p in pending if p[1] == CHANGESET_FILE), None)
+        if not item or not entry or not os.path.exists(journal_path):
+            return pending
+
+        journal = ChangesetJournal(self.project_folder)
+        if journal.is_empty():
+            return pending
+
+        full_path, rel_path = item
+        base_sha256 = entry.get("remote_sha256")
+        if not base_sha256 or not journal.covers(
+            file_marker(full_path), entry["sha256"]
+        ):
+            print(f"Edit journal does not cover all changes, sending {rel_path}")
+            return pending
+
+        try:
+            result = self.api.upload_changeset(
+                self.project_id, rel_path, journal.changes(), base_sha256
+            )
+        except Exception as e:
+            print(f"Changeset upload failed, sending {rel_path} instead: {e}")
+            return pending
+        if result is None:
+            return pending
+
+        self.on_uploaded(manifest, full_path, rel_path, result, changeset=True)
+        self.uploaded_count += 1
+        return [p for p in pending if p is not item]
+
+    def finished(self, result):
+        if not result and self.isCanceled():
+            self.errors.append("Sync canceled")
+        self.syncFinished.emit(self.uploaded_count, self.skipped_count, self.errors)
+
+
+class DownloadTask(QgsTask):
+    """Download prepared (url, path, name, sha256) jobs in the background.
+
+    Emits ``downloadFinished(summary)`` with the DownloadEngine summary dict.
+    """
+
+    downloadFinished = pyqtSignal(dict)
+
+    def __init__(self, api, jobs, max_workers=6):
+        super().__init__("TopMap Sync: downloading projects", QgsTask.CanCancel)
+        self.api = api
+        self.jobs = jobs
+        self.max_workers = max_workers
+        self.summary = {
+            "downloaded_count": 0,
+            "failed_files": [],
+            "downloaded_paths": [],
+            "total_files": len(jobs),
+        }
+
+    def run(self):
+        engine = DownloadEngine(self.api, max_workers=self.max_workers)
+        self.summary = engine.download_files(
+            self.jobs,
+            on_progress=lambda done, total: self.setProgress(100 * done / total),
+            is_canceled=self.isCanceled,
+        )
+        return not self.isCanceled()
+
+    def finished(self, result):
+        self.summary["canceled"] = self.isCanceled()
+        self.downloadFinished.emit(self.summary)
+
+
+class ProjectDownloadTask(DownloadTask):
+    """List the projects, fetch each one's files, then download them all.
+
+    Every project gets a folder under ``base_path``. The listing only carries
+    summaries; the file lists are fetched here, in the background, one
+    request per project. Emits ``projectsListed(projects)`` once the listing
+    is in, then ``projectFiles(project_id, project_path, jobs)`` for each
+    project before the downloads start. A failed listing ends the task with
+    ``summary["error"]`` set.
+    """
+
+    projectsListed = pyqtSignal(list)
+    projectFiles = pyqtSignal(int, str, list)
+
+    def __init__(self, api, base_path: str, max_workers=6):
+        super().__init__(api, [], max_workers)
+        self.base_path = base_path
+        self.error = ""
+
+    def run(self):
+        try:
+            projects = list(self.api.iter_projects())
+        except Exception as e:
+            self.error = str(e)
+            return False
+        self.projectsListed.emit(projects)
+
+        project_paths = {}
+        for project in projects:
+            if project.get("id") is None:
+                continue
+            safe_folder_name = "".join(
+                c for c in project["name"] if c.isalnum() or c in " _-"
+            ).rstrip()
+            project_path = os.path.join(self.base_path, safe_folder_name)
+            os.makedirs(project_path, exist_ok=True)
+            project_paths[project["id"]] = project_path
+
+        failed_projects = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(self.api.get_project, project_id): project_id
+                for project_id in project_paths
+            }
+            for future in as_completed(futures):
+                project_id = futures[future]
+                project_path = project_paths[project_id]
+                try:
+                    project = future.result()
+                except Exception as e:
+                    print(f"Failed to fetch project {project_id}: {e}")
+                    failed_projects.append(os.path.basename(project_path))
+                    continue
+                jobs = project_download_jobs(project, project_path)
+                self.projectFiles.emit(project_id, project_path, jobs)
+                self.jobs.extend(jobs)
+                if self.isCanceled():
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    return False
+
+        result = super().run()
+        self.summary["failed_files"] = failed_projects + self.summary["failed_files"]
+        return result
+
+    def finished(self, result):
+        self.summary["error"] = self.error
+        super().finished(result)
+
+
+class ProjectListTask(QgsTask):
+    """Fetch the project list page by page in the background.
+
+    Emits ``pageLoaded(projects)`` as each page arrives, so rows can be shown
+    before the whole list is in, then ``listFinished(complete, error)``;
+    ``complete`` is False when the listing failed or was canceled.
+    """
+
+    pageLoaded = pyqtSignal(list)
+    listFinished = pyqtSignal(bool, str)
+
+    def __init__(self, api, page_size=100, description="listing projects"):
+        super().__init__(f"TopMap Sync: {description}", QgsTask.CanCancel)
+        self.api = api
+        self.page_size = page_size
+        self.error = ""
+
+    def run(self):
+        try:
+            for page in self.api.iter_project_pages(self.page_size, summary=True):
+                if self.isCanceled():
+                    return False
+                self.emit_page(page)
+        except Exception as e:
+            self.error = str(e)
+            return False
+        return True
+
+    def emit_page(self, page):
+        self.pageLoaded.emit(page)
+
+    def finished(self, result):
+        self.listFinished.emit(result, self.error)
+
+
+class StartupTask(ProjectListTask):
+    """The one round of API calls made when the plugin window opens.
+
+    The user profile is fetched on a second thread while this one pages
+    through the project list, so both arrive within about one round trip
+    and every page shares the results. Emits ``profileLoaded(profile)``
+    besides the ProjectListTask signals. ``timings`` holds milliseconds
+    since ``started`` (a time.perf_counter() value) for each stage.
+    """
+
+    profileLoaded = pyqtSignal(dict)
+
+    def __init__(self, api, page_size=100, started=None):
+        super().__init__(api, page_size, description="loading")
+        self.started = time.perf_counter() if started is None else started
+        self.timings = {}
+
+    def mark(self, stage: str):
+        self.timings[stage] = round((time.perf_counter() - self.started) * 1000)
+
+    def fetch_profile(self):
+        try:
+            profile = self.api.get_user_profile()
+        except Exception as e:
+            print(f"Failed to fetch user profile: {e}")
+            return
+        self.mark("profile")
+        self.profileLoaded.emit(profile)
+
+    def run(self):
+        self.mark("requests_started")
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            profile = pool.submit(self.fetch_profile)
+            result = super().run()
+            profile.result()
+        self.mark("project_list")
+        return result
+
+    def emit_page(self, page):
+        if "first_page" not in self.timings:
+            self.mark("first_page")
+        super().emit_page(page)
+
+
+class ContainerizeTask(QgsTask):
+    """Export project rasters and vectors in the background.
+
+    Jobs are prepared in the constructor (main thread) and written in ``run``
+    (worker thread). Rasters are exported concurrently and each one is
+    loaded as a layer on the main thread as soon as it is written; vectors
+    share data.gpkg, so they are written one after another. The swaps of
+    all layers are applied to the project together in ``finished``, with
+    ``canvas`` (if given) frozen, and the project is then written to
+    ``qgz_path``. Emits ``containerizeFinished(errors, written)`` at the
+    end, ``written`` telling whether the project file was saved.
+    """
+
+    containerizeFinished = pyqtSignal(list, bool)
+    rasterExported = pyqtSignal(object)
+
+    def __init__(self, project, project_folder, qgz_path, canvas=None):
+        super().__init__("TopMap Sync: containerizing project", QgsTask.CanCancel)
+        self.project = project
+        self.project_folder = project_folder
+        self.qgz_path = qgz_path
+        self.canvas = canvas
+        self.swaps = LayerSwapBatch(project)
+        self.errors = []
+        self.feedback = QgsRasterBlockFeedback()
+
+        # Both processors share one fingerprint file, saved once at the end
+        self.fingerprints = LayerFingerprints(project_folder)
+        self.raster_processor = QgisRasterProcessor(
+            project, project_folder, fingerprints=self.fingerprints
+        )
+        self.vector_processor = QgisVectorProcessor(
+            project, project_folder, fingerprints=self.fingerprints
+        )
+        self.raster_jobs = self.raster_processor.prepare_jobs(self.errors)
+        self.vector_jobs = self.vector_processor.prepare_jobs(self.errors)
+        self.exported_rasters = []
+        self.exported_vectors = []
+        self.completed = 0
+
+        # Queued so the swap runs on the main thread that owns the task
+        self.rasterExported.connect(self.apply_raster, Qt.QueuedConnection)
+
+    def cancel(self):
+        self.feedback.cancel()
+        super().cancel()
+
+    def step(self, fraction=1.0):
+        """Advance progress; fractions report a job that is still running."""
+        total = len(self.raster_jobs) + len(self.vector_jobs)
+        self.setProgress(100 * (self.completed + fraction) / total)
+        if fraction >= 1.0:
+            self.completed += 1
+
+    def vector_progress(self, written, total, rate):
+        if total > 0:
+            self.step(min(written / total, 0.99))
+
+    def run(self):
+        if self.raster_jobs:
+            workers = raster_export_workers(len(self.raster_jobs))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(self.raster_processor.export, job, self.feedback): job
+                    for job in self.raster_jobs
+                }
+                for future in as_completed(futures):
+                    job = futures[future]
+                    try:
+                        future.result()
+                        self.exported_rasters.append(job)
+                        self.rasterExported.emit(job)
+                    except Exception as e:
+                        self.errors.append(f"Raster {job['name']}: {e}")
+                    self.step()
+                    if self.isCanceled():
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        return False
+
+        # One session for all tables: indexes, VACUUM and ANALYZE run once
+        with self.vector_processor.session:
+            for job in self.vector_jobs:
+                if self.isCanceled():
+                    return False
+                try:
+                    self.vector_processor.export(
+                        job, self.feedback, self.vector_progress
+                    )
+                    self.exported_vectors.append(job)
+                except Exception as e:
+                    self.errors.append(f"Vector {job['name']}: {e}")
+                self.step()
+
+        return not self.isCanceled()
+
+    def apply_raster(self, job):
+        if job.get("applied"):
+            return
+        job["applied"] = True
+        try:
+            self.raster_processor.apply(job, self.swaps)
+        except Exception as e:
+            self.errors.append(f"Raster {job['name']}: {e}")
+
+    def finished(self, result):
+        # Any raster still queued behind this call is loaded now instead
+        for job in self.exported_rasters:
+            self.apply_raster(job)
+
+        if self.isCanceled():
+            self.errors.append("Containerize canceled; vector layers left unchanged")
+        else:
+            for job in self.exported_vectors:
+                try:
+                    self.vector_processor.apply(job, self.swaps)
+                except Exception as e:
+                    self.errors.append(f"Vector {job['name']}: {e}")
+
+        self.commit_swaps()
+
+        try:
+            self.fingerprints.save()
+        except OSError as e:
+            self.errors.append(f"Layer fingerprints: {e}")
+
+        if self.gpkg_rewritten():
+            # Journaled edits no longer describe data.gpkg; send it whole
+            ChangesetJournal(self.project_folder).require_full_upload()
+
+        written = self.project.write(self.qgz_path)
+        if written and ProjectSettingsManager.get_reload_after_containerize():
+            self.project.read(self.qgz_path)
+        self.containerizeFinished.emit(self.errors, written)
+
+    def gpkg_rewritten(self) -> bool:
+        """Whether any table of data.gpkg was written or dropped."""
+        return bool(self.vector_processor.session.dropped) or any(
+            job["mode"] == "export" for job in self.exported_vectors
+        )
+
+    def commit_swaps(self):
+        if not len(self.swaps):
+            return
+        if self.canvas:
+            self.canvas.freeze(True)
+        try:
+            self.swaps.commit()
+        except Exception as e:
+            self.errors.append(f"Layer swap: {e}")
+        finally:
+            if self.canvas:
+                self.canvas.freeze(False)
+                self.canvas.refresh()
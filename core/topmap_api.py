@@ -1,6 +1,18 @@
 import requests
 import traceback
 import os
+import json
+import time
+import uuid
+from urllib.parse import urlencode
+
+from .block_delta import BlockDelta, BlockSignature, LiteralBlockReader
+from .chunked_upload import ChunkedUploader
+from .compression import CompressingStream, CompressionStats, should_compress
+from .multipart import MultipartFileStream
+from .response_cache import ResponseCache
+from .retry import CircuitBreaker, RetryPolicy
+from .transfer import DownloadEngine, project_download_jobs
 
 
 class TopMapApiClient:
@@ -9,11 +21,26 @@ class TopMapApiClient:
     BASE_URL = "https://topmapsolutions.com/api/v1"
     # BASE_URL = "http://127.0.0.1:8000/api/v1"
 
-    def __init__(self, timeout=20):
+    # Files above this size go through the resumable part-by-part upload
+    CHUNKED_UPLOAD_THRESHOLD = 64 * 1024 * 1024
+
+    # GeoPackages above this size are sent as block deltas when possible
+    DELTA_EXTENSIONS = (".gpkg",)
+    DELTA_UPLOAD_THRESHOLD = 16 * 1024 * 1024
+    DELTA_MAX_CHANGED_RATIO = 0.5
+
+    # Projects per page when listing
+    PROJECT_PAGE_SIZE = 100
+
+    def __init__(self, timeout=20, cache_ttl=60, retry=None, breaker=None):
         """Initialize the API client with default headers and timeout."""
         self.session = requests.Session()
         self.timeout = timeout
         self.token = None
+        self.cache = ResponseCache(ttl=cache_ttl)
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.compression_stats = CompressionStats()
 
         self.session.headers.update(
             {
@@ -22,15 +49,62 @@ class TopMapApiClient:
             }
         )
 
+    # -------------------- Transport --------------------
+
+    def request(
+        self, method: str, url: str, idempotent=None, body_factory=None, **kwargs
+    ):
+        """Send a request through the retry policy and circuit breaker.
+
+        GET/PUT/DELETE are retried on connection errors and transient statuses;
+        POST only when the caller passes ``idempotent=True``. A streamed body
+        can only be read once, so pass ``body_factory`` (called once per
+        attempt) instead of ``data`` to make such a request retryable. The
+        response of the last attempt is returned as-is so callers keep using
+        ``raise_for_status``.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        retryable = self.retry.can_retry(method, idempotent)
+        attempts = self.retry.max_attempts if retryable else 1
+
+        for attempt in range(1, attempts + 1):
+            self.breaker.before_call()
+            try:
+                if body_factory is not None:
+                    kwargs["data"] = body_factory()
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.breaker.record_failure()
+                if attempt == attempts:
+                    raise
+                time.sleep(self.retry.delay(attempt))
+                continue
+            except BaseException:
+                # Not the backend's fault (bad URL, unreadable file, ...), but
+                # a half-open trial must not stay claimed forever
+                self.breaker.release_trial()
+                raise
+
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+            if response.status_code not in self.retry.RETRY_STATUSES:
+                return response
+            if attempt == attempts:
+                return response
+
+            time.sleep(self.retry.delay(attempt, response))
+            response.close()
+
     # -------------------- Authentication --------------------
 
     def login(self, username, password):
         """Login and store token."""
         payload = {"username": username, "password": password}
 
-        response = self.session.post(
-            f"{self.BASE_URL}/login/", json=payload, timeout=self.timeout
-        )
+        response = self.request("POST", f"{self.BASE_URL}/login/", json=payload)
         response.raise_for_status()
 
         token = response.json().get("token")
@@ -39,6 +113,7 @@ class TopMapApiClient:
 
         self.token = token
         self.session.headers.update({"Authorization": f"Token {token}"})
+        self.cache.invalidate()
         return token
 
     def logout(self):
@@ -46,25 +121,45 @@ class TopMapApiClient:
         if not self.token:
             return
 
-        response = self.session.post(f"{self.BASE_URL}/logout/", timeout=self.timeout)
+        response = self.request("POST", f"{self.BASE_URL}/logout/", idempotent=True)
         response.raise_for_status()
 
         self.session.headers.pop("Authorization", None)
         self.token = None
+        self.cache.invalidate()
 
     # -------------------- Data Retrieval --------------------
 
+    def cached_get(self, url: str):
+        """GET a JSON resource through the response cache.
+
+        Fresh entries are returned without touching the network; stale ones are
+        revalidated with their ETag / Last-Modified validators.
+        """
+        entry = self.cache.get(url)
+        if entry and self.cache.is_fresh(entry):
+            return self.cache.hit(entry)
+
+        self.cache.miss()
+        headers = self.cache.validators(entry) if entry else {}
+        response = self.request("GET", url, headers=headers)
+        if entry and response.status_code == 304:
+            return self.cache.touch(url)
+
+        response.raise_for_status()
+        return self.cache.store(url, response)
+
+    def invalidate_projects(self):
+        """Forget cached project listings and details after a change."""
+        self.cache.invalidate(f"{self.BASE_URL}/projects/")
+
     def get_user_profile(self):
         """Fetches user that already authenticates"""
         if not self.token:
             raise ValueError("Not authenticated. Please login first.")
 
         try:
-            response = self.session.get(
-                f"{self.BASE_URL}/user-profile/", timeout=self.timeout
-            )
-            response.raise_for_status()
-            return response.json()
+            return self.cached_get(f"{self.BASE_URL}/user-profile/")
         except requests.RequestException as e:
             raise RuntimeError(f"Failed to fetch user information: {e}")
 
@@ -72,28 +167,49 @@ class TopMapApiClient:
         if not self.token:
             raise ValueError("Not authenticated. Please login first.")
         try:
-            resp = self.session.get(
-                f"{self.BASE_URL}/projects/{project_id}/", timeout=self.timeout
-            )
-            resp.raise_for_status()
-            return resp.json()
+            return self.cached_get(f"{self.BASE_URL}/projects/{project_id}/")
         except requests.RequestException as e:
             raise RuntimeError(f"Failed to fetch project {project_id}: {e}")
 
     def get_projects(self):
-        """Fetch projects for the authenticated user."""
+        """Fetch projects for the authenticated user, including their files."""
+        return [
+            project
+            for page in self.iter_project_pages(summary=False)
+            for project in page
+        ]
+
+    def iter_project_pages(self, page_size=PROJECT_PAGE_SIZE, summary=True):
+        """Yield the user's projects one page (list) at a time.
+
+        Follows the server's ``next`` links; a server that answers with a
+        plain list is treated as a single page. ``summary`` asks the server
+        to leave out each project's ``files``; get_project has them.
+        """
         if not self.token:
             raise ValueError("Not authenticated. Please login first.")
 
+        params = {"page_size": page_size}
+        if summary:
+            params["summary"] = 1
+        url = f"{self.BASE_URL}/projects/?{urlencode(params)}"
+
         try:
-            response = self.session.get(
-                f"{self.BASE_URL}/projects/", timeout=self.timeout
-            )
-            response.raise_for_status()
-            return response.json()
+            while url:
+                data = self.cached_get(url)
+                if isinstance(data, list):
+                    yield data
+                    return
+                yield data.get("results", [])
+                url = data.get("next")
         except requests.RequestException as e:
             raise RuntimeError(f"Failed to fetch projects: {e}")
 
+    def iter_projects(self, page_size=PROJECT_PAGE_SIZE, summary=True):
+        """Yield the user's projects one by one, fetching pages as needed."""
+        for page in self.iter_project_pages(page_size, summary):
+            yield from page
+
     def download_project(self, project_id: int, destination_folder: str):
         """Download all files from a specific project by ID."""
         if not self.token:
@@ -101,12 +217,7 @@ class TopMapApiClient:
 
         try:
             # Get project details including files
-            response = self.session.get(
-                f"{self.BASE_URL}/projects/{project_id}/",
-                timeout=self.timeout,
-            )
-            response.raise_for_status()
-            project = response.json()
+            project = self.cached_get(f"{self.BASE_URL}/projects/{project_id}/")
 
             # Create project folder
             project_name = project.get("name", f"project_{project_id}")
@@ -117,41 +228,13 @@ class TopMapApiClient:
             os.makedirs(project_path, exist_ok=True)
 
             # Download all files
-            files = project.get("files", [])
-            downloaded_count = 0
-            failed_files = []
-
-            for file in files:
-                file_url = file["file"]
-                file_name = file["name"]
-
-                name_part, extension = os.path.splitext(file_name)
-                clean_name = "".join(c for c in name_part if c.isalnum() or c in " _-")
-                safe_file_name = f"{clean_name}{extension}"
-                file_path = os.path.join(project_path, safe_file_name)
-
-                try:
-                    r = self.session.get(
-                        file_url,
-                        stream=True,
-                        timeout=20,
-                    )
-                    r.raise_for_status()
-                    with open(file_path, "wb") as f:
-                        for chunk in r.iter_content(chunk_size=8192):
-                            f.write(chunk)
-                    downloaded_count += 1
-                    print(f"Downloaded {file_name} to {project_path}")
-                except Exception as e:
-                    failed_files.append(file_name)
-                    print(f"Failed to download {file_name}: {e}")
+            jobs = project_download_jobs(project, project_path)
+            summary = DownloadEngine(self).download_files(jobs)
 
             return {
                 "project_name": project_name,
                 "project_path": project_path,
-                "downloaded_count": downloaded_count,
-                "failed_files": failed_files,
-                "total_files": len(files),
+                **summary,
             }
 
         except requests.RequestException as e:
@@ -163,10 +246,11 @@ class TopMapApiClient:
             raise ValueError("Not Authenticated. Please login first.")
 
         try:
-            response = self.session.post(
-                f"{self.BASE_URL}/projects/", json=payload, timeout=self.timeout
+            response = self.request(
+                "POST", f"{self.BASE_URL}/projects/", json=payload
             )
             response.raise_for_status()
+            self.invalidate_projects()
             return response.json()
         except requests.RequestException as e:
             raise RuntimeError(f"Failed to create project: {e}")
@@ -179,10 +263,11 @@ class TopMapApiClient:
         payload = input_payload
 
         try:
-            response = self.session.put(
-                f"{self.BASE_URL}/projects/{id}/", json=payload, timeout=self.timeout
+            response = self.request(
+                "PUT", f"{self.BASE_URL}/projects/{id}/", json=payload
             )
             response.raise_for_status()
+            self.invalidate_projects()
             return response.json()
         except requests.RequestException as e:
             raise RuntimeError(f"Failed to fetch projects: {e}")
@@ -193,33 +278,223 @@ class TopMapApiClient:
             raise ValueError("Not Authenticated. Please login first.")
 
         try:
-            response = self.session.delete(
-                f"{self.BASE_URL}/projects/{id}/", timeout=self.timeout
-            )
+            response = self.request("DELETE", f"{self.BASE_URL}/projects/{id}/")
             response.raise_for_status()
+            self.invalidate_projects()
             return True
 
         except requests.RequestException as e:
             raise RuntimeError(f"Failed to delete the project: {e}")
 
-    def upload_file(self, project_id: int, file_path: str, relative_path: str = None):
+    def upload_file(
+        self,
+        project_id: int,
+        file_path: str,
+        relative_path: str = None,
+        limiter=None,
+        progress=None,
+        encoding=None,
+    ):
+        """Upload a single file without loading it into memory.
+
+        ``limiter`` optionally caps shared bandwidth and ``progress(sent, total)``
+        is called with byte counts as the body is sent. With ``encoding``
+        ("gzip" or "zstd") compressible files are sent with that
+        Content-Encoding; the achieved ratio ends up in ``compression_stats``.
+        """
         if not self.token:
             raise ValueError("Not authenticated. Please login first.")
 
+        if encoding and not should_compress(file_path):
+            encoding = None
+
+        delta_eligible = self.delta_eligible(file_path)
+        if delta_eligible:
+            result = self.upload_delta(
+                project_id, file_path, relative_path, limiter, progress, encoding
+            )
+            if result is not None:
+                return result
+
+        result = self.upload_full(
+            project_id, file_path, relative_path, limiter, progress, encoding
+        )
+
+        if delta_eligible:
+            # Remember what the server now holds for the next delta upload
+            try:
+                BlockSignature.compute(file_path).save(file_path)
+            except OSError as e:
+                print(f"Could not store block signature for {file_path}: {e}")
+        return result
+
+    def upload_full(
+        self, project_id, file_path, relative_path, limiter, progress, encoding
+    ):
+        """Send the whole file, chunked and resumable above the size threshold."""
+        if os.path.getsize(file_path) > self.CHUNKED_UPLOAD_THRESHOLD:
+            try:
+                result = ChunkedUploader(self, encoding=encoding).upload(
+                    project_id,
+                    file_path,
+                    relative_path,
+                    limiter=limiter,
+                    progress=progress,
+                )
+                self.invalidate_projects()
+                return result
+            except requests.RequestException as e:
+                raise RuntimeError(f"Failed to upload file '{file_path}': {e} ")
+
         url = f"{self.BASE_URL}/projects/{project_id}/files/upload/"
 
         data = {}
         if relative_path:
             data["path"] = relative_path
 
-        with open(file_path, "rb") as f:
-            files = {"file": (os.path.basename(file_path), f)}
-            try:
-                response = self.session.post(
-                    url, files=files, data=data, timeout=self.timeout
+        boundary = uuid.uuid4().hex
+        bodies = []
+
+        def open_body():
+            # A fresh stream per attempt; the boundary keeps Content-Type valid
+            body = MultipartFileStream(
+                file_path,
+                fields=data,
+                progress=progress,
+                limiter=limiter,
+                boundary=boundary,
+            )
+            payload = CompressingStream(body, encoding) if encoding else body
+            bodies.append((body, payload))
+            return payload
+
+        headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+        if encoding:
+            headers["Content-Encoding"] = encoding
+
+        try:
+            # Uploading a path again replaces the file, so retrying is safe
+            response = self.request(
+                "POST",
+                url,
+                idempotent=True,
+                body_factory=open_body,
+                headers=headers,
+            )
+            response.raise_for_status()
+            self.invalidate_projects()
+
+            if encoding:
+                payload = bodies[-1][1]
+                self.compression_stats.record(
+                    file_path, encoding, payload.raw_bytes, payload.encoded_bytes
                 )
-                response.raise_for_status()
-                return response.json()
+            return response.json()
 
-            except requests.RequestException as e:
-                raise RuntimeError(f"Failed to upload file '{file_path}': {e} ")
+        except requests.RequestException as e:
+            raise RuntimeError(f"Failed to upload file '{file_path}': {e} ")
+        finally:
+            for body, _ in bodies:
+                body.close()
+
+    # -------------------- Block delta uploads --------------------
+
+    def delta_eligible(self, file_path: str) -> bool:
+        return (
+            file_path.lower().endswith(self.DELTA_EXTENSIONS)
+            and os.path.getsize(file_path) > self.DELTA_UPLOAD_THRESHOLD
+        )
+
+    def upload_delta(
+        self, project_id, file_path, relative_path, limiter, progress, encoding
+    ):
+        """Send only the blocks that changed since the last upload.
+
+        Returns None when a delta is not possible (no stored signature, the
+        server lacks the base version or the endpoint, or too much changed),
+        in which case the caller falls back to a full upload.
+        """
+        base = BlockSignature.load(file_path)
+        if not base:
+            return None
+
+        delta = BlockDelta.compute(base, file_path)
+        if delta.literal_size > delta.new.size * self.DELTA_MAX_CHANGED_RATIO:
+            return None
+
+        url = f"{self.BASE_URL}/projects/{project_id}/files/delta/"
+        fields = {"recipe": json.dumps(delta.recipe())}
+        if relative_path:
+            fields["path"] = relative_path
+
+        literals = LiteralBlockReader(file_path, delta.literals, delta.new.block_size)
+        body = MultipartFileStream(
+            file_path,
+            fields=fields,
+            progress=progress,
+            limiter=limiter,
+            fileobj=literals,
+            file_size=delta.literal_size,
+        )
+        headers = {"Content-Type": body.content_type}
+        payload = body
+        if encoding:
+            payload = CompressingStream(body, encoding)
+            headers["Content-Encoding"] = encoding
+
+        try:
+            response = self.request("POST", url, data=payload, headers=headers)
+        except requests.RequestException as e:
+            raise RuntimeError(f"Failed to upload delta for '{file_path}': {e} ")
+        finally:
+            body.close()
+            literals.close()
+
+        if response.status_code in (404, 409, 412):
+            # Unknown endpoint or the server's copy is not our base version
+            print(f"Delta upload rejected for {file_path}, sending full file")
+            return None
+        try:
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise RuntimeError(f"Failed to upload delta for '{file_path}': {e} ")
+
+        delta.new.save(file_path)
+        self.invalidate_projects()
+        print(
+            f"Delta upload {file_path}: {delta.literal_size} of "
+            f"{delta.new.size} bytes sent"
+        )
+        return response.json()
+
+    # -------------------- Feature changesets --------------------
+
+    def upload_changeset(
+        self, project_id: int, relative_path: str, changes: list, base_sha256: str
+    ):
+        """Send journaled feature edits instead of the whole GeoPackage.
+
+        Returns None when the server cannot apply them (no changeset endpoint
+        or its copy is not ``base_sha256``) so the caller uploads the file.
+        """
+        if not self.token:
+            raise ValueError("Not authenticated. Please login first.")
+
+        payload = {
+            "path": relative_path,
+            "base_sha256": base_sha256,
+            "changes": changes,
+        }
+        try:
+            response = self.request(
+                "POST",
+                f"{self.BASE_URL}/projects/{project_id}/files/changeset/",
+                json=payload,
+            )
+            if response.status_code in (404, 409, 412):
+                return None
+            response.raise_for_status()
+            self.invalidate_projects()
+            return response.json()
+        except requests.RequestException as e:
+            raise RuntimeError(f"Failed to upload changeset for '{relative_path}': {e}")
@@ -0,0 +1,327 @@
+import os
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from requests.adapters import HTTPAdapter
+
+from .compression import accept_encoding_header
+
+
+class BandwidthLimiter:
+    """Token bucket shared by all transfer workers to cap total throughput."""
+
+    def __init__(self, bytes_per_second: int):
+        self.rate = bytes_per_second
+        self.allowance = float(bytes_per_second)
+        self.last_check = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, amount: int):
+        if not self.rate or amount <= 0:
+            return
+
+        with self.lock:
+            now = time.monotonic()
+            self.allowance = min(
+                self.rate, self.allowance + (now - self.last_check) * self.rate
+            )
+            self.last_check = now
+            self.allowance -= amount
+            wait = -self.allowance / self.rate if self.allowance < 0 else 0
+
+        if wait:
+            time.sleep(wait)
+
+
+def mount_pool(session, max_workers: int):
+    """Make sure the session keeps enough keep-alive connections for the workers."""
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+class UploadEngine:
+    """Upload many files concurrently through one TopMapApiClient.
+
+    Workers share the client's requests.Session, so connections are reused
+    across files instead of paying a handshake per upload.
+    """
+
+    def __init__(self, api, max_workers=4, max_bandwidth=0, encoding=None):
+        self.api = api
+        self.max_workers = max(1, int(max_workers))
+        self.limiter = BandwidthLimiter(max_bandwidth) if max_bandwidth else None
+        self.encoding = encoding
+        mount_pool(self.api.session, self.max_workers)
+
+    def upload_files(
+        self,
+        project_id: int,
+        items,
+        on_uploaded=None,
+        on_progress=None,
+        is_canceled=None,
+    ):
+        """Upload (full_path, rel_path) pairs.
+
+        ``on_uploaded(full_path, rel_path, result)`` and ``on_progress(done,
+        total)`` are called from the calling thread as each upload finishes.
+        When ``is_canceled()`` turns true, queued uploads are dropped.
+        Returns ``(uploaded_count, errors)`` where errors use the usual
+        ``"rel_path: message"`` format.
+        """
+        uploaded_count = 0
+        errors = []
+        done = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(
+                    self.api.upload_file,
+                    project_id,
+                    full_path,
+                    relative_path=rel_path,
+                    limiter=self.limiter,
+                    encoding=self.encoding,
+                ): (full_path, rel_path)
+                for full_path, rel_path in items
+            }
+
+            for future in as_completed(futures):
+                full_path, rel_path = futures[future]
+                try:
+                    result = future.result()
+                    uploaded_count += 1
+                    print(f"Uploaded: {rel_path} -> {result}")
+                    if on_uploaded:
+                        on_uploaded(full_path, rel_path, result)
+                except Exception as e:
+                    errors.append(f"{rel_path}: {str(e)}")
+
+                done += 1
+                if on_progress:
+                    on_progress(done, len(futures))
+                if is_canceled and is_canceled():
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    break
+
+        return uploaded_count, errors
+
+
+def local_file_name(file_name: str) -> str:
+    """Strip characters from a remote file name that are unsafe on disk."""
+    name_part, extension = os.path.splitext(file_name)
+    clean_name = "".join(c for c in name_part if c.isalnum() or c in " _-").rstrip()
+    return f"{clean_name}{extension}"
+
+
+def project_download_jobs(project: dict, project_path: str):
+    """Build (file_url, file_path, file_name, sha256) jobs for a project's files.
+
+    ``sha256`` is None when the server did not send a checksum for the file.
+    """
+    return [
+        (
+            file["file"],
+            os.path.join(project_path, local_file_name(file["name"])),
+            file["name"],
+            file.get("sha256"),
+        )
+        for file in project.get("files", [])
+    ]
+
+
+class DownloadEngine:
+    """Download many files concurrently through one TopMapApiClient session."""
+
+    CHUNK_SIZE = 1024 * 1024
+    PART_SUFFIX = ".part"
+    VALIDATOR_SUFFIX = ".validator"
+
+    def __init__(self, api, max_workers: int = 4, timeout: int = 20):
+        self.api = api
+        self.max_workers = max(1, int(max_workers))
+        self.timeout = timeout
+        mount_pool(self.api.session, self.max_workers)
+
+    def download_file(self, file_url: str, file_path: str, sha256: str = None):
+        """Download into ``<file_path>.part`` and rename once complete.
+
+        An existing ``.part`` file is resumed with an HTTP Range request, so an
+        interrupted download never leaves a truncated file at ``file_path``.
+        The range is sent with ``If-Range`` and the ETag or Last-Modified the
+        partial copy was fetched under, so a file that changed on the server
+        is sent whole and the ``.part`` starts over instead of being spliced.
+        """
+        part_path = f"{file_path}{self.PART_SUFFIX}"
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        validator = self.load_validator(part_path) if offset else None
+        if validator:
+            # Byte ranges only line up with the decoded file without encoding
+            headers = {
+                "Range": f"bytes={offset}-",
+                "If-Range": validator,
+                "Accept-Encoding": "identity",
+            }
+        elif sha256:
+            # A partial copy we cannot validate is not worth resuming
+            offset = 0
+            headers = {"Accept-Encoding": accept_encoding_header()}
+        else:
+            # Without a checksum only Content-Length can vouch for the file,
+            # and it describes the decoded bytes only for an unencoded body
+            offset = 0
+            headers = {"Accept-Encoding": "identity"}
+
+        with self.api.request(
+            "GET", file_url, stream=True, timeout=self.timeout, headers=headers
+        ) as r:
+            if r.status_code == 416:
+                # Nothing left to fetch; the size check below decides
+                expected_size = self.expected_size(r, 0) or offset
+            else:
+                r.raise_for_status()
+                if r.status_code != 206:
+                    # Server ignored the range or the file changed since the
+                    # partial copy was made; start the file over
+                    offset = 0
+                    self.save_validator(part_path, r)
+                expected_size = self.expected_size(r, offset)
+                sha256 = sha256 or r.headers.get("X-Checksum-SHA256")
+                if r.headers.get("Content-Encoding") and not sha256:
+                    raise RuntimeError(
+                        "Encoded download without a checksum cannot be verified"
+                    )
+
+                mode = "ab" if offset else "wb"
+                raw_bytes = 0
+                with open(part_path, mode, buffering=self.CHUNK_SIZE) as f:
+                    for chunk in r.iter_content(chunk_size=self.CHUNK_SIZE):
+                        f.write(chunk)
+                        raw_bytes += len(chunk)
+
+                encoding = r.headers.get("Content-Encoding")
+                if encoding:
+                    self.api.compression_stats.record(
+                        file_path, encoding, raw_bytes, r.raw.tell()
+                    )
+
+        actual_size = os.path.getsize(part_path)
+        if expected_size is not None and actual_size != expected_size:
+            if actual_size > expected_size:
+                # Remote file changed under the partial copy; restart next time
+                self.discard_part(part_path)
+            raise RuntimeError(
+                f"Incomplete download ({actual_size} of {expected_size} bytes)"
+            )
+
+        if sha256 and self.file_sha256(part_path) != sha256.lower():
+            self.discard_part(part_path)
+            raise RuntimeError("Checksum mismatch, partial file discarded")
+
+        os.replace(part_path, file_path)
+        self.clear_validator(part_path)
+
+    def validator_path(self, part_path: str) -> str:
+        return f"{part_path}{self.VALIDATOR_SUFFIX}"
+
+    def load_validator(self, part_path: str):
+        try:
+            with open(self.validator_path(part_path), "r", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def save_validator(self, part_path: str, response):
+        """Remember what identifies the version a fresh ``.part`` is fetched from.
+
+        Only a strong ETag or a Last-Modified date can be used with If-Range,
+        and only for an unencoded body, whose bytes are the file's bytes.
+        """
+        etag = response.headers.get("ETag", "")
+        validator = etag if etag and not etag.startswith("W/") else None
+        validator = validator or response.headers.get("Last-Modified")
+        if not validator or response.headers.get("Content-Encoding"):
+            self.clear_validator(part_path)
+            return
+        with open(self.validator_path(part_path), "w", encoding="utf-8") as f:
+            f.write(validator)
+
+    def clear_validator(self, part_path: str):
+        try:
+            os.remove(self.validator_path(part_path))
+        except FileNotFoundError:
+            pass
+
+    def discard_part(self, part_path: str):
+        os.remove(part_path)
+        self.clear_validator(part_path)
+
+    @staticmethod
+    def expected_size(response, offset: int):
+        content_range = response.headers.get("Content-Range", "")
+        total = content_range.rpartition("/")[2]
+        if total.isdigit():
+            return int(total)
+
+        length = response.headers.get("Content-Length")
+        if length and length.isdigit() and "Content-Encoding" not in response.headers:
+            return offset + int(length)
+        return None
+
+    @classmethod
+    def file_sha256(cls, file_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(cls.CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def download_files(self, jobs, on_progress=None, is_canceled=None):
+        """Download (file_url, file_path, file_name, sha256) jobs.
+
+        Progress and cancellation hooks behave as in UploadEngine.upload_files.
+        Returns a summary dict with ``downloaded_count``, ``failed_files``,
+        ``downloaded_paths`` and ``total_files``, matching what
+        ``download_project`` reports.
+        """
+        downloaded_count = 0
+        failed_files = []
+        downloaded_paths = []
+        done = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(self.download_file, file_url, file_path, sha256): (
+                    file_path,
+                    file_name,
+                )
+                for file_url, file_path, file_name, sha256 in jobs
+            }
+
+            for future in as_completed(futures):
+                file_path, file_name = futures[future]
+                try:
+                    future.result()
+                    downloaded_count += 1
+                    downloaded_paths.append(file_path)
+                    print(f"Downloaded {file_name} to {os.path.dirname(file_path)}")
+                except Exception as e:
+                    failed_files.append(file_name)
+                    print(f"Failed to download {file_name}: {e}")
+
+                done += 1
+                if on_progress:
+                    on_progress(done, len(futures))
+                if is_canceled and is_canceled():
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    break
+
+        return {
+            "downloaded_count": downloaded_count,
+            "failed_files": failed_files,
+            "downloaded_paths": downloaded_paths,
+            "total_files": len(jobs),
+        }
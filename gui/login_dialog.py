@@ -1,10 +1,14 @@
-import os
-from PyQt5 import QtCore, QtWidgets, uic
+from PyQt5 import QtCore, QtWidgets
 from ..core.topmap_api import TopMapApiClient
 from qgis.core import QgsSettings
 
+from .ui_forms import load_form_class
 
-class LoginDialog(QtWidgets.QDialog):
+
+FORM_CLASS = load_form_class("login_dialog.ui")
+
+
+class LoginDialog(QtWidgets.QDialog, FORM_CLASS):
     """
     Login dialog for TopMapSync plugin.
 
@@ -16,8 +20,7 @@ class LoginDialog(QtWidgets.QDialog):
         super().__init__(parent)
 
         # Load UI
-        ui_path = os.path.join(os.path.dirname(__file__), "..", "ui", "login_dialog.ui")
-        uic.loadUi(ui_path, self)
+        self.setupUi(self)
 
         self.api = TopMapApiClient()
         self.settings = QgsSettings()
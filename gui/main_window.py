@@ -13,6 +13,13 @@ class MainWindow(QtWidgets.QMainWindow):
         self.setMinimumSize(700, 700)
         self.setCentralWidget(self.stack)
 
+    def show_status(self, message: str):
+        """Show a loading/status message; an empty message clears it."""
+        if message:
+            self.statusBar().showMessage(message)
+        else:
+            self.statusBar().clearMessage()
+
     def push_page(self, widget):
         self.stack.addWidget(widget)
         self.stack.setCurrentWidget(widget)
@@ -1,13 +1,17 @@
 import os
 
-from PyQt5 import QtWidgets, uic
+from PyQt5 import QtWidgets
 from PyQt5.QtCore import pyqtSignal
 from qgis.core import QgsProject, QgsSettings, QgsVectorLayer, QgsVectorFileWriter
 
 from ..core.project_manager import ProjectSettingsManager
+from .ui_forms import load_form_class
 
 
-class ProjectUploadPage(QtWidgets.QWidget):
+FORM_CLASS = load_form_class("project_new_window.ui")
+
+
+class ProjectUploadPage(QtWidgets.QWidget, FORM_CLASS):
     """Create a new project, upload to cloud, and initialize its local QGIS workspace."""
 
     projectCreated = pyqtSignal()
@@ -18,10 +22,7 @@ class ProjectUploadPage(QtWidgets.QWidget):
     def __init__(self, api, username=None, parent=None):
         super().__init__(parent)
 
-        ui_path = os.path.join(
-            os.path.dirname(__file__), "..", "ui", "project_new_window.ui"
-        )
-        uic.loadUi(ui_path, self)
+        self.setupUi(self)
 
         if api is None:
             raise ValueError("ProjectUploadWindows requires a logged-in API key")
@@ -1,18 +1,25 @@
 import os
-from PyQt5 import QtWidgets, uic
+from PyQt5 import QtWidgets
 from PyQt5.QtCore import pyqtSignal
 
 from qgis.core import (
-    QgsProject,
+    QgsApplication,
     QgsProject,
     QgsSettings,
 )
+from qgis.utils import iface
 
+from ..core.metadata_store import MetadataStore
 from ..core.project_manager import ProjectSettingsManager
-from ..core.qgis_process import QgisRasterProcessor, QgisVectorProcessor
+from ..core.raster_profile import RasterOutputProfile
+from ..core.tasks import ContainerizeTask, SyncTask
+from .ui_forms import load_form_class
+
 
+FORM_CLASS = load_form_class("project_details_window.ui")
 
-class ProjectDetailsPage(QtWidgets.QWidget):
+
+class ProjectDetailsPage(QtWidgets.QWidget, FORM_CLASS):
     """Window to view and edit project details."""
 
     projectDeleted = pyqtSignal()
@@ -23,13 +30,12 @@ class ProjectDetailsPage(QtWidgets.QWidget):
     def __init__(self, project_data, parent=None, api=None, username=None):
         super().__init__(parent)
 
-        ui_path = os.path.join(
-            os.path.dirname(__file__), "..", "ui", "project_details_window.ui"
-        )
-        uic.loadUi(ui_path, self)
+        self.setupUi(self)
 
         self.project_data = project_data
         self.api = api
+        self.sync_task = None
+        self.containerize_task = None
 
         if username:
             self.usernameLabel.setText(username)
@@ -139,37 +145,35 @@ class ProjectDetailsPage(QtWidgets.QWidget):
             )
             return
 
-        # Folder Looping
-        uploaded_count = 0
-        errors = []
-
-        for root, dirs, files in os.walk(project_folder):
-            for filename in files:
-                # Only allow project files
-                if not (filename.endswith((".qgz", ".gpkg", ".qml", ".tif", ".tiff"))):
-                    continue
-
-                full_path = os.path.join(root, filename)
-                rel_path = os.path.relpath(full_path, project_folder)
+        # Upload in the background so QGIS stays responsive
+        self.sync_task = SyncTask(
+            self.api,
+            project_id,
+            project_folder,
+            max_workers=ProjectSettingsManager.get_upload_workers(),
+            bandwidth=ProjectSettingsManager.get_upload_bandwidth(),
+            encoding=ProjectSettingsManager.get_upload_encoding(),
+        )
+        self.sync_task.syncFinished.connect(self.on_sync_finished)
+        self.syncButton.setEnabled(False)
+        QgsApplication.taskManager().addTask(self.sync_task)
 
-                try:
-                    result = self.api.upload_file(
-                        project_id, full_path, relative_path=rel_path
-                    )
-                    uploaded_count += 1
-                    print(f"Uploaded: {rel_path} -> {result}")
-                except Exception as e:
-                    errors.append(f"{rel_path}: {str(e)}")
+    def on_sync_finished(self, uploaded_count, skipped_count, errors):
+        self.syncButton.setEnabled(True)
+        self.sync_task = None
+        if not errors and self.project_data.get("id") is not None:
+            MetadataStore().mark_synced(self.project_data["id"])
 
+        summary = f"{skipped_count} skipped / {uploaded_count} uploaded"
         if errors:
             QtWidgets.QMessageBox.warning(
                 self,
                 "Sync Completed",
-                f"Uploaded {uploaded_count} files with errors:\n" + "\n".join(errors),
+                f"{summary} with errors:\n" + "\n".join(errors),
             )
         else:
             QtWidgets.QMessageBox.information(
-                self, "Sync Completed", f"Successfully uploaded {uploaded_count} files!"
+                self, "Sync Completed", f"Sync finished: {summary} files."
             )
 
     def on_delete_clicked(self):
@@ -208,6 +212,9 @@ class ProjectDetailsPage(QtWidgets.QWidget):
         project = QgsProject.instance()
         project_name = self.project_data.get("name")
 
+        if not self.choose_raster_profile(project):
+            return
+
         root_dir = ProjectSettingsManager.get_root_dir()
         project_folder = os.path.join(root_dir, "TopMapSync", project_name)
         os.makedirs(project_folder, exist_ok=True)
@@ -218,20 +225,42 @@ class ProjectDetailsPage(QtWidgets.QWidget):
         project.setPresetHomePath(project_folder)
         project.writeEntry("Paths", "/Absolute", False)
 
-        project.write()
-
-        total_errors = []
-
-        raster_processor = QgisRasterProcessor(project, project_folder)
-        total_errors.extend(raster_processor.process_rasters())
-
-        vector_processor = QgisVectorProcessor(project, project_folder)
-        total_errors.extend(vector_processor.process_vector())
+        # Export in the background; layer swaps happen back on the main thread.
+        # The task writes the project file itself, so closing this page while
+        # it runs loses nothing.
+        canvas = iface.mapCanvas() if iface else None
+        self.containerize_task = ContainerizeTask(
+            project, project_folder, qgz_path, canvas
+        )
+        self.containerize_task.containerizeFinished.connect(
+            self.on_containerize_finished
+        )
+        self.containerizeBtn.setEnabled(False)
+        QgsApplication.taskManager().addTask(self.containerize_task)
+
+    def choose_raster_profile(self, project) -> bool:
+        """Ask how rasters are encoded; the choice is stored in the project."""
+        presets = list(RasterOutputProfile.PRESETS)
+        current = RasterOutputProfile(
+            ProjectSettingsManager.get_raster_profile(project)
+        ).name
+        name, ok = QtWidgets.QInputDialog.getItem(
+            self,
+            "Containerize",
+            "Raster encoding:",
+            presets,
+            presets.index(current),
+            False,
+        )
+        if ok:
+            ProjectSettingsManager.set_raster_profile(project, name)
+        return ok
 
-        success = project.write(qgz_path)
+    def on_containerize_finished(self, total_errors, success):
+        self.containerizeBtn.setEnabled(True)
+        self.containerize_task = None
 
         if success:
-            project.read(qgz_path)
             msg = "Project is now fully portable (Rasters + GPKG)!"
             if total_errors:
                 msg += "\n\nWarnings: \n" + "\n".join(total_errors)
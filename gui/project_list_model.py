@@ -0,0 +1,136 @@
+from datetime import datetime
+from functools import lru_cache
+
+from PyQt5 import QtCore
+from PyQt5.QtCore import Qt
+
+
+@lru_cache(maxsize=4096)
+def format_date(raw_date: str) -> str:
+    """Turn an API ISO timestamp into the date shown in the project list."""
+    try:
+        if raw_date.endswith("Z"):
+            raw_date = raw_date.replace("Z", "+00:00")
+
+        dt = datetime.fromisoformat(raw_date)
+        return dt.strftime("%Y-%m-%d -- %H:%M -- (%Z)")
+    except Exception:
+        return raw_date
+
+
+class ProjectRecord:
+    """The few fields of an API project the list and details pages use."""
+
+    __slots__ = ("id", "name", "description", "user", "created_at")
+
+    def __init__(self, id, name, description, user, created_at):
+        self.id = id
+        self.name = name
+        self.description = description
+        self.user = user
+        self.created_at = created_at
+
+    @classmethod
+    def from_api(cls, project: dict):
+        return cls(
+            project.get("id"),
+            project.get("name", ""),
+            project.get("description"),
+            project.get("user"),
+            project.get("created_at") or "",
+        )
+
+    def key(self):
+        return self.id if self.id is not None else self.name
+
+    def values(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def as_dict(self) -> dict:
+        return {
+            name: value
+            for name, value in zip(self.__slots__, self.values())
+            if value is not None
+        }
+
+
+class ProjectListModel(QtCore.QAbstractTableModel):
+    """Table model over compact ProjectRecords.
+
+    Dates are formatted only when a row is painted. ``set_projects`` diffs
+    the new API list against the current rows, so a refresh only touches
+    rows that were added, removed or changed; ``merge_projects`` and
+    ``remove_missing`` do the same a page at a time.
+    """
+
+    COLUMNS = ("Name", "Date")
+    SORT_ROLE = Qt.UserRole + 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.records = []
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.records)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self.records[index.row()]
+
+        if role == Qt.DisplayRole:
+            if index.column() == 0:
+                return record.name
+            return format_date(record.created_at)
+        if role == self.SORT_ROLE:
+            # ISO timestamps sort correctly as text
+            return record.name.lower() if index.column() == 0 else record.created_at
+        if role == Qt.UserRole:
+            return record
+        return None
+
+    def record(self, row: int) -> ProjectRecord:
+        return self.records[row]
+
+    def set_projects(self, projects: list):
+        self.remove_missing(self.merge_projects(projects))
+
+    def merge_projects(self, projects: list) -> set:
+        """Update changed rows and append new ones; returns the keys seen."""
+        incoming = [ProjectRecord.from_api(project) for project in projects]
+        rows = {record.key(): row for row, record in enumerate(self.records)}
+
+        added = []
+        for record in incoming:
+            row = rows.get(record.key())
+            if row is None:
+                added.append(record)
+            elif self.records[row].values() != record.values():
+                self.records[row] = record
+                self.dataChanged.emit(
+                    self.index(row, 0), self.index(row, len(self.COLUMNS) - 1)
+                )
+
+        if added:
+            first = len(self.records)
+            self.beginInsertRows(QtCore.QModelIndex(), first, first + len(added) - 1)
+            self.records.extend(added)
+            self.endInsertRows()
+        return {record.key() for record in incoming}
+
+    def remove_missing(self, keys: set):
+        """Drop rows of projects that are no longer in ``keys``."""
+        # From the bottom up so row numbers stay valid
+        for row in range(len(self.records) - 1, -1, -1):
+            if self.records[row].key() not in keys:
+                self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+                del self.records[row]
+                self.endRemoveRows()
@@ -1,19 +1,23 @@
 import os
 import shutil
-import requests
-from datetime import datetime
 
-from PyQt5 import QtCore, QtWidgets, uic
+from PyQt5 import QtCore, QtWidgets
 from PyQt5.QtCore import pyqtSignal
-from qgis.core import QgsSettings
+from qgis.core import QgsApplication, QgsSettings
 
 
 from ..core.topmap_api import TopMapApiClient
+from ..core.metadata_store import MetadataStore
 from ..core.project_manager import ProjectSettingsManager
-from .project_create_window import ProjectUploadPage
+from ..core.tasks import ProjectDownloadTask, ProjectListTask
+from .project_list_model import ProjectListModel
+from .ui_forms import load_form_class
 
 
-class ProjectlistPage(QtWidgets.QWidget):
+FORM_CLASS = load_form_class("projects_list_window.ui")
+
+
+class ProjectlistPage(QtWidgets.QWidget, FORM_CLASS):
     """Project list"""
 
     openProject = pyqtSignal(dict)
@@ -22,33 +26,59 @@ class ProjectlistPage(QtWidgets.QWidget):
     statusMessage = pyqtSignal(str)
     logoutClicked = pyqtSignal()
 
-    def __init__(self, api=None, parent=None):
+    PAGE_SIZE = 100
+
+    def __init__(self, api=None, parent=None, bootstrap=None):
+        """``bootstrap`` is a StartupTask whose profile and list this page uses."""
         super().__init__(parent)
 
-        ui_path = os.path.join(
-            os.path.dirname(__file__), "..", "ui", "projects_list_window.ui"
-        )
-        uic.loadUi(ui_path, self)
+        self.setupUi(self)
 
         self.refresh_directory_display()
 
         # Other Windows
         self.api = api or TopMapApiClient()
+        self.download_task = None
+        self.list_task = None
+        self.bootstrap = bootstrap
+        self.listed_projects = set()
+        self.store = MetadataStore()
+
+        # Model rows are compact records; the proxy sorts and filters them
+        self.project_model = ProjectListModel(self)
+        self.project_proxy = QtCore.QSortFilterProxyModel(self)
+        self.project_proxy.setSourceModel(self.project_model)
+        self.project_proxy.setSortRole(ProjectListModel.SORT_ROLE)
+        self.project_proxy.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
+        self.project_proxy.setFilterKeyColumn(0)
+        self.projectTable.setModel(self.project_proxy)
+        self.projectTable.sortByColumn(0, QtCore.Qt.AscendingOrder)
+        self.projectTable.verticalHeader().setDefaultSectionSize(22)
+        self.projectTable.setColumnWidth(0, 460)
+        self.projectTable.setColumnWidth(1, 200)
         self.projectTable.doubleClicked.connect(self.on_table_double_clicked)
+        self.searchInput.textChanged.connect(self.project_proxy.setFilterFixedString)
 
         # Buttons
         self.closeBtn.clicked.connect(self.closeClicked.emit)
         self.newBtn.clicked.connect(self.create_new_project)
         self.loadBtn.clicked.connect(self.load_projects_to_folder)
         self.editBtn.clicked.connect(self.on_edit_clicked)
-        self.refreshBtn.clicked.connect(self.populate_project_list)
+        self.refreshBtn.clicked.connect(self.on_refresh_clicked)
         self.folderBtn.clicked.connect(self.on_open_project_clicked)
         self.helpBtn.clicked.connect(self.on_help_clicked)
         self.logoutBtn.clicked.connect(self.logout)
 
-        # Fetch Data from the API
-        self.populate_project_list()
-        self.get_user_profile()
+        # Show what we knew last time, then reconcile with the API
+        self.show_cached_data()
+        if bootstrap:
+            bootstrap.profileLoaded.connect(
+                lambda profile: self.on_startup_profile(bootstrap, profile)
+            )
+            self.watch_list_task(bootstrap)
+        else:
+            self.populate_project_list()
+            self.get_user_profile()
 
     # -------------------------
     # Button Handlers
@@ -69,7 +99,9 @@ class ProjectlistPage(QtWidgets.QWidget):
         QtWidgets.QMessageBox.information(self, "Update", "Feature coming soon!")
 
     def on_refresh_clicked(self) -> None:
-        QtWidgets.QMessageBox.information(self, "Update", "Feature coming soon!")
+        """Refresh bypasses the API response cache."""
+        self.api.invalidate_projects()
+        self.populate_project_list()
 
     def on_open_project_clicked(self) -> None:
         path = QtWidgets.QFileDialog.getExistingDirectory(self, "Select Root")
@@ -106,6 +138,13 @@ class ProjectlistPage(QtWidgets.QWidget):
     # -------------------------
     # User Information
     # -------------------------
+    def show_cached_data(self):
+        """Fill the list and username from the local metadata store."""
+        profile = self.store.get_profile()
+        if profile:
+            self.usernameLabel.setText(profile.get("username", "user"))
+        self.project_model.set_projects(self.store.projects())
+
     def get_user_profile(self):
         """Fetch user information from the API"""
         try:
@@ -114,6 +153,14 @@ class ProjectlistPage(QtWidgets.QWidget):
             QtWidgets.QMessageBox.critical(self, "API Error", str(e))
             return
 
+        self.on_profile_loaded(user_details)
+
+    def on_startup_profile(self, task, user_details):
+        if task is self.bootstrap:
+            self.on_profile_loaded(user_details)
+
+    def on_profile_loaded(self, user_details):
+        self.store.set_profile(user_details)
         self.usernameLabel.setText(user_details.get("username", "user"))
 
         profile_info = user_details.get("profile", {})
@@ -142,51 +189,55 @@ class ProjectlistPage(QtWidgets.QWidget):
         event.accept()
 
     def populate_project_list(self):
-        """Fetch projects from the API"""
-        try:
-            projects = self.api.get_projects()
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(self, "API Error", str(e))
-            return
-
-        table = self.projectTable
-        table.setRowCount(len(projects))
-        table.setSortingEnabled(True)
-
-        for idx, project in enumerate(projects, start=1):
-            row = idx - 1
-
-            item1 = QtWidgets.QTableWidgetItem(project.get("name", ""))
-            item1.setFlags(item1.flags() ^ QtCore.Qt.ItemIsEditable)
-            item1.setData(QtCore.Qt.UserRole, project)
-            table.setItem(row, 0, item1)
-
-            raw_date = project.get("created_at", "")
-
-            try:
-                if raw_date.endswith("Z"):
-                    raw_date = raw_date.replace("Z", "+00:00")
+        """Fetch projects from the API, adding rows as each page arrives.
+
+        Only project summaries are listed; file lists are fetched for a
+        single project when it is downloaded.
+        """
+        if self.list_task:
+            self.list_task.cancel()
+
+        task = ProjectListTask(self.api, self.PAGE_SIZE)
+        self.watch_list_task(task)
+        QgsApplication.taskManager().addTask(task)
+
+    def stop_list_task(self):
+        """Cancel the listing and ignore whatever it still delivers."""
+        if self.list_task:
+            self.list_task.cancel()
+        self.list_task = None
+        self.bootstrap = None
+
+    def watch_list_task(self, task):
+        """Fill the table from a ProjectListTask (or StartupTask) as it runs."""
+        self.listed_projects = set()
+        task.pageLoaded.connect(lambda page: self.on_projects_page(task, page))
+        task.listFinished.connect(
+            lambda complete, error: self.on_projects_listed(task, complete, error)
+        )
+        self.list_task = task
+        self.statusMessage.emit("Loading projects...")
 
-                dt = datetime.fromisoformat(raw_date)
-                formatted_date = dt.strftime("%Y-%m-%d -- %H:%M -- (%Z)")
-            except Exception:
-                formatted_date = raw_date
+    def on_projects_page(self, task, page):
+        if task is not self.list_task:
+            return
+        self.listed_projects |= self.project_model.merge_projects(page)
+        self.store.upsert_projects(page)
 
-            item2 = QtWidgets.QTableWidgetItem(formatted_date)
-            item2.setFlags(item2.flags() ^ QtCore.Qt.ItemIsEditable)
-            table.setItem(row, 1, item2)
+    def on_projects_listed(self, task, complete, error):
+        if task is not self.list_task:
+            return
+        self.list_task = None
+        self.statusMessage.emit("")
 
-        table.setColumnWidth(0, 460)
-        table.setColumnWidth(1, 200)
+        if error:
+            QtWidgets.QMessageBox.critical(self, "API Error", error)
+        elif complete:
+            self.project_model.remove_missing(self.listed_projects)
+            self.store.prune_projects(self.listed_projects)
 
     def load_projects_to_folder(self):
         """Load project files to local folder and cleanup deleted projects."""
-        try:
-            projects = self.api.get_projects()
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(self, "API Error", str(e))
-            return
-
         root_dir = ProjectSettingsManager.get_root_dir()
         if not root_dir:
             QtWidgets.QMessageBox.warning(
@@ -199,59 +250,80 @@ class ProjectlistPage(QtWidgets.QWidget):
         base_path = os.path.join(root_dir, "TopMapSync")
         os.makedirs(base_path, exist_ok=True)
 
-        # ----------------- Cleanup -----------------
-        project_names_api = set(
-            "".join(c for c in p["name"] if c.isalnum() or c in " _-").rstrip()
-            for p in projects
+        # Listing, folders and file lists are all fetched by the task
+        self.download_task = ProjectDownloadTask(
+            self.api,
+            base_path,
+            max_workers=ProjectSettingsManager.get_download_workers(),
         )
+        self.download_task.projectsListed.connect(
+            lambda projects: self.on_download_listed(base_path, projects)
+        )
+        self.download_task.projectFiles.connect(self.on_project_files)
+        self.download_task.downloadFinished.connect(
+            lambda summary: self.on_download_finished(base_path, summary)
+        )
+        self.loadBtn.setEnabled(False)
+        QgsApplication.taskManager().addTask(self.download_task)
+
+    def on_download_listed(self, base_path, projects):
+        """Cleanup once the download task has the full project list."""
+        self.store.upsert_projects(projects)
+        self.store.prune_projects(p["id"] for p in projects if "id" in p)
+        self.remove_deleted_projects(base_path, projects)
+
+    def on_project_files(self, project_id, project_path, jobs):
+        self.store.set_files(project_id, project_path, jobs)
+        if not jobs:
+            print(f"No files in project: {os.path.basename(project_path)}")
+
+    def remove_deleted_projects(self, base_path, projects):
+        """Remove local folders of projects deleted in the backend.
+
+        The metadata store knows which folders it downloaded; only before the
+        first indexed download do we fall back to scanning base_path.
+        """
+        removed = self.store.local_paths(removed=True)
+        if removed or self.store.local_paths():
+            folders = [path for path in removed.values() if os.path.isdir(path)]
+        else:
+            project_names_api = set(
+                "".join(c for c in p["name"] if c.isalnum() or c in " _-").rstrip()
+                for p in projects
+            )
+            folders = [
+                os.path.join(base_path, folder)
+                for folder in os.listdir(base_path)
+                if folder not in project_names_api
+                and os.path.isdir(os.path.join(base_path, folder))
+            ]
+
+        for folder_path in folders:
+            try:
+                shutil.rmtree(folder_path)
+                print(f"Removed local folder deleted in backend: {folder_path}")
+            except Exception as e:
+                print(f"Failed to remove folder {folder_path}: {e}")
+        self.store.forget_projects(removed.keys())
+
+    def on_download_finished(self, base_path, summary):
+        self.loadBtn.setEnabled(True)
+        self.download_task = None
+        self.store.mark_downloaded(summary.get("downloaded_paths", []))
+
+        if summary.get("error"):
+            QtWidgets.QMessageBox.critical(self, "API Error", summary["error"])
+            return
 
-        local_folders = set(os.listdir(base_path))
-        for folder in local_folders:
-            folder_path = os.path.join(base_path, folder)
-            if folder not in project_names_api and os.path.isdir(folder_path):
-                try:
-                    shutil.rmtree(folder_path)
-                    print(f"Removed local folder deleted in backend: {folder_path}")
-                except Exception as e:
-                    print(f"Failed to remove folder {folder_path}: {e}")
-
-        # ----------------- Download -----------------
-        for project in projects:
-            folder_name = project["name"]
-            safe_folder_name = "".join(
-                c for c in folder_name if c.isalnum() or c in " _-"
-            ).rstrip()
-            project_path = os.path.join(base_path, safe_folder_name)
-            os.makedirs(project_path, exist_ok=True)
-
-            files = project.get("files", [])
-            if not files:
-                print(f"No files in project: {folder_name}")
-                continue
-
-            for file in files:
-                file_url = file["file"]
-                file_name = file["name"]
-
-                name_part, extension = os.path.splitext(file_name)
-
-                clean_name = "".join(
-                    c for c in name_part if c.isalnum() or c in " _-"
-                ).rstrip()
-
-                safe_file_name = f"{clean_name}{extension}"
-                file_path = os.path.join(project_path, safe_file_name)
-
-                try:
-                    r = requests.get(file_url, stream=True, timeout=15, headers={})
-                    r.raise_for_status()
-
-                    with open(file_path, "wb") as f:
-                        for chunk in r.iter_content(chunk_size=8192):
-                            f.write(chunk)
-                    print(f"Downloaded {file_name} to {project_path}")
-                except Exception as e:
-                    print(f"Failed to download {file_name}: {e}")
+        if summary["failed_files"] or summary.get("canceled"):
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Projects Loaded",
+                f"Downloaded {summary['downloaded_count']} of "
+                f"{summary['total_files']} files. Failed:\n"
+                + "\n".join(summary["failed_files"]),
+            )
+            return
 
         QtWidgets.QMessageBox.information(
             self,
@@ -261,8 +333,8 @@ class ProjectlistPage(QtWidgets.QWidget):
 
     def on_table_double_clicked(self, index):
         """This runs when you double click"""
-        row = index.row()
-        project_data = self.projectTable.item(row, 0).data(QtCore.Qt.UserRole)
+        source_index = self.project_proxy.mapToSource(index)
+        record = self.project_model.record(source_index.row())
 
-        if project_data:
-            self.openProject.emit(project_data)
+        if record:
+            self.openProject.emit(record.as_dict())
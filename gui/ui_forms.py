@@ -0,0 +1,16 @@
+import os
+
+from PyQt5 import uic
+
+UI_DIR = os.path.join(os.path.dirname(__file__), "..", "ui")
+
+
+def load_form_class(ui_name: str):
+    """Compile a .ui file from the plugin's ui folder into its form class.
+
+    Pages call this at module level and mix the class in, so the XML is
+    parsed once per QGIS session, when the page module is first imported,
+    and constructing a page only runs the generated ``setupUi``.
+    """
+    form_class, _ = uic.loadUiType(os.path.join(UI_DIR, ui_name))
+    return form_class
@@ -1,14 +1,19 @@
 import os
+import time
+from typing import TYPE_CHECKING
+
 from PyQt5.QtGui import QIcon
 from PyQt5.QtWidgets import QAction
-from qgis.core import QgsSettings
+from qgis.core import Qgis, QgsApplication, QgsMessageLog, QgsSettings
+
+from .core.changeset import EditTracker
 
-from .core.topmap_api import TopMapApiClient
-from .gui.login_dialog import LoginDialog
-from .gui.main_window import MainWindow
-from .gui.project_details_window import ProjectDetailsPage
-from .gui.project_list_window import ProjectlistPage
-from .gui.project_create_window import ProjectUploadPage
+# The API client (requests) and the GUI pages are imported when the plugin
+# is first opened, not when QGIS loads it
+if TYPE_CHECKING:
+    from .core.tasks import StartupTask
+    from .gui.login_dialog import LoginDialog
+    from .gui.project_list_window import ProjectlistPage
 
 PLUGIN_NAME = "TopMap Sync"
 
@@ -20,6 +25,10 @@ class TopMapSync:
         self.iface = iface
         self.login: LoginDialog | None = None
         self.action: QAction | None = None
+        self.edit_tracker: EditTracker | None = None
+        self.startup_task: StartupTask | None = None
+        self.project_list: ProjectlistPage | None = None
+        self.username = "user"
 
     def initGui(self):
         """Set up toolbar button and menu entry."""
@@ -36,14 +45,25 @@ class TopMapSync:
         # Connect click to plugin entry point
         self.action.triggered.connect(self.run)
 
+        # Journal feature edits on containerized layers for changeset sync
+        self.edit_tracker = EditTracker()
+        self.edit_tracker.start()
+
     def unload(self):
         """Clean up toolbar and menu on plugin unload."""
         if self.action:
             self.iface.removeToolBarIcon(self.action)
             self.iface.removePluginMenu(f"&{PLUGIN_NAME}", self.action)
+        if self.edit_tracker:
+            self.edit_tracker.stop()
+            self.edit_tracker = None
 
     def run(self):
         """Plugin entry point when user clicks the icon."""
+        started = time.perf_counter()
+        from .core.topmap_api import TopMapApiClient
+        from .gui.login_dialog import LoginDialog
+
         settings = QgsSettings()
         saved_token = settings.value("TopMap/token", "")
 
@@ -52,37 +72,49 @@ class TopMapSync:
         if saved_token:
             api.token = saved_token
             api.session.headers.update({"Authorization": f"Token {saved_token}"})
-            try:
-                user_details = api.get_user_profile()
-                self.username = user_details.get("username", "user")
-            except Exception as e:
-                self.username = "user"
-                print(f"Failed to fetch user profile: {e}")
-
-            self.open_main(api)
+            self.open_main(api, started)
         else:
             self.login = LoginDialog(self.iface.mainWindow())
             if self.login.exec_():
-                api = self.login.api
-                try:
-                    user_details = api.get_user_profile()
-                    self.username = user_details.get("username", "user")
-                except Exception as e:
-                    self.username = "user"
-                    print(f"Failed to fetch user profile: {e}")
-                self.open_main(api)
+                self.open_main(self.login.api)
 
     # CONTROLLERS
 
-    def open_main(self, api):
+    def open_main(self, api, started=None):
+        """Show the main window at once and load its data in the background.
+
+        Profile and project list are fetched together by one StartupTask and
+        shared with the pages; until they arrive the pages show the cached
+        metadata and a loading message. ``started`` is when the click was
+        handled, so the timing breakdown includes the deferred imports.
+        """
+        started = time.perf_counter() if started is None else started
+        from .core.metadata_store import MetadataStore
+        from .core.tasks import StartupTask
+        from .gui.main_window import MainWindow
+        from .gui.project_list_window import ProjectlistPage
+
+        profile = MetadataStore().get_profile() or {}
+        self.username = profile.get("username", "user")
+
         self.main_window = MainWindow(api, parent=self.iface.mainWindow())
 
-        project_list = ProjectlistPage(api=api)
+        task = StartupTask(api, started=started)
+        task.mark("modules_imported")
+        task.profileLoaded.connect(self.on_profile_loaded)
+        task.listFinished.connect(lambda *_: self.on_startup_finished(task))
+        self.startup_task = task
+
+        project_list = ProjectlistPage(api=api, bootstrap=task)
+        task.mark("list_page_built")
+        self.project_list = project_list
 
         self.main_window.push_page(project_list)
 
         project_list.closeClicked.connect(self.main_window.close)
         project_list.logoutClicked.connect(self.on_logout)
+        project_list.statusMessage.connect(self.main_window.show_status)
+        self.main_window.show_status("Loading projects...")
 
         # signals in main window
         project_list.createProject.connect(
@@ -93,13 +125,31 @@ class TopMapSync:
         )
 
         self.main_window.show()
+        task.mark("window_shown")
+        QgsApplication.taskManager().addTask(task)
+
+    def on_profile_loaded(self, user_details):
+        self.username = user_details.get("username", "user")
+
+    def on_startup_finished(self, task):
+        from .core.project_manager import ProjectSettingsManager
+
+        if ProjectSettingsManager.get_log_timings():
+            timings = ", ".join(
+                f"{stage} {ms} ms" for stage, ms in task.timings.items()
+            )
+            QgsMessageLog.logMessage(f"startup: {timings}", PLUGIN_NAME, Qgis.Info)
+        if task is self.startup_task:
+            self.startup_task = None
 
     def open_create_project(self, api, username):
+        from .gui.project_create_window import ProjectUploadPage
+
         page = ProjectUploadPage(api=api, username=username, parent=self.main_window)
         page.backClicked.connect(self.main_window.pop_page)
         page.projectCreated.connect(self.open_project_created)
         page.closeClicked.connect(self.main_window.close)
-        page.logoutClicked.connect(self.main_window.close)
+        page.logoutClicked.connect(self.on_logout)
         self.main_window.push_page(page)
 
     def open_project_created(self):
@@ -117,6 +167,8 @@ class TopMapSync:
             current.populate_project_list()
 
     def open_project_details(self, api, project_data, username):
+        from .gui.project_details_window import ProjectDetailsPage
+
         page = ProjectDetailsPage(
             project_data=project_data,
             api=api,
@@ -132,6 +184,16 @@ class TopMapSync:
         self.main_window.push_page(page)
 
     def on_logout(self):
+        """Forget the user's cached metadata when any page logs out."""
+        from .core.metadata_store import MetadataStore
+
+        # Disown the listing first so a late page cannot re-fill the store
+        if self.project_list:
+            self.project_list.stop_list_task()
+            self.project_list = None
+        self.startup_task = None
+        MetadataStore().clear()
+
         if hasattr(self, "main_window") and self.main_window:
             self.main_window.close()
             self.main_window.deleteLater()